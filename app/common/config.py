@@ -1,7 +1,16 @@
+import json
 import sys
+import threading
+import time
+from pathlib import Path
 
 from qfluentwidgets import ConfigItem, QConfig, qconfig, BoolValidator
 
+from app.common.utils import write_atomic
+
+CONFIG_FILE = 'app/resource/config/config.json'
+SAVE_DELAY = 0.5  # 秒 最后一次修改后多久写入文件
+
 
 def isWin11():
     return sys.platform == 'win32' and sys.getwindowsversion().build >= 22000
@@ -12,10 +21,76 @@ class Config(QConfig):
     enableAutoSelect = ConfigItem('ChampSelectCard', 'EnableAutoSelect', False, BoolValidator())
     wantSelectChamps = ConfigItem('ChampSelectCard', 'WantSelectChamps', [157])
     wantBanChamps = ConfigItem('ChampSelectCard', 'WantBanChamps', [])
+    enableAutoBan = ConfigItem('ChampSelectCard', 'EnableAutoBan', False, BoolValidator())
+    # 自动锁定禁用时先亮起一段时间再锁定
+    banHoverFirst = ConfigItem('ChampSelectCard', 'BanHoverFirst', False, BoolValidator())
 
     enableAutoReconnect = ConfigItem('GameCard', 'EnableAutoReconnect', False, BoolValidator())
     enableAutoSearch = ConfigItem('GameCard', 'EnableAutoSearch', False, BoolValidator())
 
+    # 客户端lockfile路径 如 C:/Riot Games/League of Legends/lockfile 为空则扫描进程
+    lockfilePath = ConfigItem('LcuCard', 'LockfilePath', '')
+
+    # 统计请求和websocket的耗时 关闭时没有额外开销
+    enableMetrics = ConfigItem('Diagnostics', 'EnableMetrics', False, BoolValidator())
+    # 录制websocket事件到 app/resource/journal 可选同时录制REST响应
+    enableJournal = ConfigItem('Diagnostics', 'EnableJournal', False, BoolValidator())
+    journalRest = ConfigItem('Diagnostics', 'JournalRest', False, BoolValidator())
+
+    def __init__(self):
+        super().__init__()
+        self.file = Path(CONFIG_FILE)
+        self.changed = threading.Condition()
+        self.deadline = None  # 有未写入的修改时为计划写入的时间
+        self.writing = False
+        self.writer = None
+        self.writes = 0
+
+    def save(self):
+        """
+        配置项的值本身就是内存中的最新状态 这里只安排写入
+        SAVE_DELAY秒内没有新的修改后由后台线程写一次文件(先写临时文件再替换)
+        """
+        with self.changed:
+            self.deadline = time.monotonic() + SAVE_DELAY
+            if self.writer is None:
+                self.writer = threading.Thread(target=self.__run, name='config-writer', daemon=True)
+                self.writer.start()
+            self.changed.notify_all()
+
+    def __run(self):
+        while True:
+            with self.changed:
+                while self.deadline is None or self.deadline > time.monotonic():
+                    self.changed.wait(None if self.deadline is None else self.deadline - time.monotonic())
+                self.deadline = None
+                self.writing = True
+            try:
+                data = json.dumps(self.toDict(), ensure_ascii=False, indent=4).encode('utf-8')
+                write_atomic(str(self.file), data)
+            except OSError as e:
+                print('config', repr(e))
+            finally:
+                with self.changed:
+                    self.writing = False
+                    self.writes += 1
+                    self.changed.notify_all()
+
+    def flush(self):
+        """立即写入还未保存的修改并等待写完 退出前调用"""
+        with self.changed:
+            if self.deadline is not None:
+                self.deadline = 0
+                self.changed.notify_all()
+            while self.deadline is not None or self.writing:
+                self.changed.wait()
+
 
 cfg = Config()
-qconfig.load("app/resource/config/config.json", cfg)
+
+
+def load_config(file=CONFIG_FILE):
+    """读取配置文件 导入时不再读取 需在创建界面前调用一次"""
+    qconfig.load(file, cfg)
+    # SwitchSettingCard等通过qconfig.set修改 同样延迟写入
+    qconfig.save = cfg.save
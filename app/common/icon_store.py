@@ -0,0 +1,184 @@
+import asyncio
+import mmap
+import os
+import struct
+
+from PyQt6.QtGui import QPixmap
+
+# 英雄图标都在打包文件中 目录只剩旧版本下载的png等待迁移 图标路径仍为 {CHAMP_ICON_DIR}/{id}.png
+CHAMP_ICON_DIR = 'app/resource/game/champ_icons'
+CHAMP_ICON_STORE = 'app/resource/game/champ_icons.pack'
+
+MAGIC = b'LAIS'
+VERSION = 1
+HEADER = struct.Struct('<4sHI')  # magic version 数量
+ENTRY = struct.Struct('<iII')  # 英雄id 偏移 长度
+
+
+class IconStore:
+    """
+    打包的图标文件 头部 + 按id排序的索引 + png数据
+    通过mmap打开 get返回指向文件内容的memoryview 不复制
+    """
+
+    def __init__(self, file):
+        self.file = file
+        with open(file, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.mm.close()
+            raise ValueError(f'invalid icon store: {file}')
+        self.index = {champ_id: (offset, length) for champ_id, offset, length in
+                      ENTRY.iter_unpack(self.mm[HEADER.size:HEADER.size + count * ENTRY.size])}
+        self.view = memoryview(self.mm)
+
+    def get(self, champ_id):
+        entry = self.index.get(champ_id)
+        if entry is None:
+            return None
+        offset, length = entry
+        return self.view[offset:offset + length]
+
+    def __contains__(self, champ_id):
+        return champ_id in self.index
+
+    def ids(self):
+        return self.index.keys()
+
+    def close(self):
+        self.view.release()
+        self.mm.close()
+
+    @staticmethod
+    def build(entries, file):
+        """entries: [(英雄id, png bytes)]"""
+        entries = sorted(entries)
+        offset = HEADER.size + len(entries) * ENTRY.size
+        index = []
+        for champ_id, data in entries:
+            index.append(ENTRY.pack(champ_id, offset, len(data)))
+            offset += len(data)
+        with open(file, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(entries)))
+            f.write(b''.join(index))
+            for _, data in entries:
+                f.write(data)
+
+    @staticmethod
+    def list_dir(directory):
+        """目录下的 {id}.png 返回 id -> 文件名 只列目录不读取"""
+        files = {}
+        for name in os.listdir(directory):
+            stem, ext = os.path.splitext(name)
+            if ext == '.png' and stem.lstrip('-').isdigit():
+                files[int(stem)] = name
+        return files
+
+    @staticmethod
+    def read_dir(directory, files=None):
+        """读取目录下的 {id}.png"""
+        entries = []
+        for champ_id, name in (files or IconStore.list_dir(directory)).items():
+            with open(os.path.join(directory, name), 'rb') as f:
+                entries.append((champ_id, f.read()))
+        return entries
+
+
+_store = None
+_store_opened = False
+_pending = {}  # 已下载还未写入打包文件的图标 id -> png
+
+
+def get_champ_icon_store():
+    """打开打包的英雄图标 不存在时返回None"""
+    global _store, _store_opened
+    if not _store_opened:
+        _store_opened = True
+        try:
+            _store = IconStore(CHAMP_ICON_STORE)
+        except (OSError, ValueError, struct.error):
+            _store = None
+    return _store
+
+
+def close_champ_icon_store():
+    global _store, _store_opened
+    if _store:
+        _store.close()
+    _store, _store_opened = None, False
+
+
+def has_champ_icon(champ_id):
+    """只查内存中的索引 目录中的png需先由migrate_champ_icons打包"""
+    store = get_champ_icon_store()
+    return champ_id in _pending or (store is not None and champ_id in store)
+
+
+def add_champ_icon(champ_id, data):
+    """下载的图标先放在内存中 立即可以显示 之后由migrate_champ_icons写入打包文件"""
+    _pending[champ_id] = data
+
+
+def _pack(directory, pending, tmp):
+    """打包文件中已有的图标 + 目录中散落的png + 新下载的图标 写入tmp 都没有时返回None 否则返回已打包的png"""
+    files = IconStore.list_dir(directory) if os.path.isdir(directory) else {}
+    if not files and not pending:
+        return None
+    store = get_champ_icon_store()
+    entries = {champ_id: bytes(store.get(champ_id)) for champ_id in store.ids()} if store else {}
+    if files:
+        entries.update(IconStore.read_dir(directory, files))
+    entries.update(pending)
+    IconStore.build(entries.items(), tmp)
+    return files
+
+
+def _remove_files(directory, files):
+    for name in files.values():
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError as e:
+            print('icon store', repr(e))
+    try:
+        os.rmdir(directory)
+    except OSError:
+        pass
+
+
+async def migrate_champ_icons(directory=CHAMP_ICON_DIR):
+    """
+    将目录中散落的png(旧版本下载的)和新下载的图标合并进打包文件 替换成功后删除这些png
+    没有需要加入的图标时不做处理
+    """
+    tmp = f'{CHAMP_ICON_STORE}.tmp'
+    pending = dict(_pending)
+    files = await asyncio.to_thread(_pack, directory, pending, tmp)
+    if files is None:
+        return
+    # windows下被映射的文件无法替换 先关闭
+    close_champ_icon_store()
+    os.replace(tmp, CHAMP_ICON_STORE)
+    for champ_id, data in pending.items():
+        # 打包期间又下载了同一个图标时保留新的
+        if _pending.get(champ_id) is data:
+            del _pending[champ_id]
+    if files:
+        await asyncio.to_thread(_remove_files, directory, files)
+
+
+def load_pixmap(icon):
+    """英雄图标优先从还未打包的下载和打包文件读取 其余按路径读取"""
+    if icon and os.path.dirname(icon) == CHAMP_ICON_DIR:
+        stem = os.path.splitext(os.path.basename(icon))[0]
+        if stem.lstrip('-').isdigit():
+            champ_id = int(stem)
+            store = get_champ_icon_store()
+            data = _pending.get(champ_id)
+            if data is None and store:
+                data = store.get(champ_id)
+            if data is not None:
+                pixmap = QPixmap()
+                pixmap.loadFromData(data)
+                return pixmap
+    return QPixmap(icon)
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+
+from PyQt6.QtCore import Qt, QRectF
+from PyQt6.QtGui import QPixmap, QPainter, QPainterPath, QColor, QPen
+
+from app.common.icon_store import load_pixmap
+
+BORDER_COLOR = QColor(120, 90, 40)
+
+
+class PixmapCache:
+    """LRU缓存 按像素占用的内存限制大小"""
+
+    def __init__(self, limit=32 * 1024 * 1024):
+        self.limit = limit
+        self.size = 0
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        item = self.items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.items.move_to_end(key)
+        return item[0]
+
+    def put(self, key, pixmap: QPixmap):
+        cost = pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+        if key in self.items:
+            self.__remove(key)
+        self.items[key] = (pixmap, cost)
+        self.size += cost
+        while self.size > self.limit and len(self.items) > 1:
+            self.__remove(next(iter(self.items)))
+
+    def __remove(self, key):
+        _, cost = self.items.pop(key)
+        self.size -= cost
+
+    def clear(self):
+        self.items.clear()
+        self.size = 0
+
+
+pixmap_cache = PixmapCache()
+
+
+def round_pixmap(icon, crop, width, height, dpr, expanding=False, background=False, border=0):
+    """
+    裁掉边缘crop像素 缩放到 width*height 裁剪为圆形 可选黑色背景和边框
+    结果按参数缓存 重绘时直接drawPixmap
+    """
+    key = (icon, crop, width, height, dpr, expanding, background, border)
+    cached = pixmap_cache.get(key)
+    if cached is not None:
+        return cached
+
+    source = load_pixmap(icon)
+    if source.isNull():
+        # 图标可能还在下载 不缓存
+        return source
+
+    image = source.copy(crop, crop, source.width() - 2 * crop, source.height() - 2 * crop)
+    mode = Qt.AspectRatioMode.KeepAspectRatioByExpanding if expanding else Qt.AspectRatioMode.KeepAspectRatio
+    image = image.scaled(int(width * dpr), int(height * dpr), mode, Qt.TransformationMode.SmoothTransformation)
+
+    result = QPixmap(int(width * dpr), int(height * dpr))
+    result.setDevicePixelRatio(dpr)
+    result.fill(Qt.GlobalColor.transparent)
+
+    painter = QPainter(result)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    path = QPainterPath()
+    path.addEllipse(QRectF(0, 0, width, height))
+    painter.setClipPath(path)
+
+    if background:
+        painter.setBrush(QColor(0, 0, 0))
+        painter.drawEllipse(QRectF(0, 0, width, height))
+
+    painter.drawPixmap(QRectF(0, 0, width, height), image, QRectF(image.rect()))
+
+    if border:
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.setPen(QPen(BORDER_COLOR, border, Qt.PenStyle.SolidLine))
+        painter.drawEllipse(QRectF(0, 0, width, height))
+    painter.end()
+
+    pixmap_cache.put(key, result)
+    return result
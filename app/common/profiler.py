@@ -0,0 +1,209 @@
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+PROFILE_DIR = 'app/resource/profile'
+PROFILE_ENV = 'LOL_ASSIST_PROFILE'
+
+
+def profile_mode(argv=None):
+    """
+    --profile 或环境变量 LOL_ASSIST_PROFILE=1 只监测事件循环延迟
+    --profile=cprofile / yappi 同时记录整个会话的函数耗时 退出时保存
+    未开启返回None
+    """
+    argv = sys.argv if argv is None else argv
+    for arg in argv[1:]:
+        if arg == '--profile':
+            return 'lag'
+        if arg.startswith('--profile='):
+            return arg.split('=', 1)[1] or 'lag'
+    value = os.environ.get(PROFILE_ENV, '')
+    if value in ('', '0'):
+        return None
+    return 'lag' if value == '1' else value
+
+
+def describe(handle):
+    """回调的名称 协程的一步显示协程名"""
+    callback = handle._callback
+    task = getattr(callback, '__self__', None)
+    if isinstance(task, asyncio.Task):
+        return f'task {task.get_name()} {task.get_coro().__qualname__}'
+    return getattr(callback, '__qualname__', repr(callback))
+
+
+class LoopProfiler:
+    """
+    心跳协程每interval秒醒来一次 实际醒来时间与预期之差即事件循环延迟
+    看门狗线程发现心跳超过threshold秒没有更新时 抓取主线程当前的调用栈(正在阻塞的代码)
+    替换 Handle._run 记录超过threshold的回调和协程步骤
+    """
+
+    def __init__(self, mode='lag', interval=0.05, threshold=0.1):
+        self.mode = mode
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = 0
+        self.max_lag = 0
+        self.lags = deque(maxlen=int(10 / interval))  # 最近10秒
+        self.stalls = 0
+        self.slow_callbacks = 0
+        self.beat = time.monotonic()
+        self.reported_beat = None
+        self.stopped = threading.Event()
+        self.main_thread_id = threading.get_ident()
+        self.task = None
+        self.watchdog = None
+        self.profile = None
+        self.yappi = None
+        self.original_run = None
+
+    def __import_yappi(self):
+        try:
+            import yappi
+        except ImportError:
+            return False
+        self.yappi = yappi
+        return True
+
+    def start(self, loop):
+        self.main_thread_id = threading.get_ident()
+        self.beat = time.monotonic()
+        self.task = loop.create_task(self.__heartbeat())
+        self.watchdog = threading.Thread(target=self.__watch, name='loop-watchdog', daemon=True)
+        self.watchdog.start()
+        self.__patch_handle()
+
+        if self.mode == 'yappi' and not self.__import_yappi():
+            print('yappi未安装 使用cProfile')
+            self.mode = 'cprofile'
+        if self.mode == 'cprofile':
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        elif self.mode == 'yappi':
+            self.yappi.set_clock_type('wall')
+            self.yappi.start()
+        print(f'profiler started: mode={self.mode} threshold={self.threshold * 1000:.0f}ms')
+
+    async def __heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lag = max(loop.time() - expected, 0)
+            self.max_lag = max(self.max_lag, self.lag)
+            self.lags.append(self.lag)
+            self.beat = time.monotonic()
+
+    def __watch(self):
+        while not self.stopped.wait(self.threshold / 2):
+            beat = self.beat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled <= self.threshold or beat == self.reported_beat:
+                continue
+            # 每次阻塞只报告一次
+            self.reported_beat = beat
+            self.stalls += 1
+            frame = sys._current_frames().get(self.main_thread_id)
+            stack = ''.join(traceback.format_stack(frame)) if frame else ''
+            print(f'[profiler] event loop blocked > {stalled * 1000:.0f}ms, main thread stack:\n{stack}')
+
+    def __patch_handle(self):
+        original = self.original_run = asyncio.Handle._run
+        profiler = self
+
+        def _run(handle):
+            start = time.perf_counter()
+            try:
+                return original(handle)
+            finally:
+                elapsed = time.perf_counter() - start
+                if elapsed > profiler.threshold:
+                    profiler.on_slow_callback(handle, elapsed)
+
+        asyncio.Handle._run = _run
+
+    def on_slow_callback(self, handle, elapsed):
+        self.slow_callbacks += 1
+        print(f'[profiler] slow callback {elapsed * 1000:.0f}ms: {describe(handle)}')
+        task = getattr(handle._callback, '__self__', None)
+        if isinstance(task, asyncio.Task) and not task.done():
+            # 慢的那一步之后协程停在的位置
+            file = io.StringIO()
+            task.print_stack(limit=8, file=file)
+            print(file.getvalue())
+
+    def lag_percentile(self, p):
+        if not self.lags:
+            return 0
+        lags = sorted(self.lags)
+        return lags[min(len(lags) - 1, int(len(lags) * p / 100))]
+
+    def stats(self):
+        return {'lag_ms': self.lag * 1000, 'p99_lag_ms': self.lag_percentile(99) * 1000,
+                'max_lag_ms': self.max_lag * 1000, 'stalls': self.stalls, 'slow_callbacks': self.slow_callbacks}
+
+    def stop(self):
+        """停止监测 保存并输出函数耗时 返回保存的文件"""
+        self.stopped.set()
+        if self.task:
+            self.task.cancel()
+        if self.original_run:
+            asyncio.Handle._run = self.original_run
+            self.original_run = None
+        print('profiler', {key: round(value, 1) for key, value in self.stats().items()})
+
+        file = None
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        name = time.strftime('profile-%Y%m%d-%H%M%S')
+        if self.profile:
+            self.profile.disable()
+            file = os.path.join(PROFILE_DIR, f'{name}.prof')
+            self.profile.dump_stats(file)
+            pstats.Stats(self.profile).sort_stats('cumulative').print_stats(20)
+        elif self.mode == 'yappi':
+            self.yappi.stop()
+            file = os.path.join(PROFILE_DIR, f'{name}.pstat')
+            self.yappi.get_func_stats().save(file, type='pstat')
+            self.yappi.get_func_stats().print_all()
+        if file:
+            print('profile saved', file)
+        return file
+
+
+class StartupTimer:
+    """记录启动各阶段的时间 同时给出距进程创建(含解释器和打包程序解压)与距main.py开始执行的毫秒数"""
+
+    def __init__(self, start=None):
+        # main.py在其他导入之前记下的时间 导入本身的耗时也要算进去
+        self.start = start or time.time()
+        self.marks = []
+
+    def mark(self, name):
+        self.marks.append((name, time.time()))
+
+    def report(self, file=None):
+        """输出到stdout 打包为窗口程序(console=False)时没有stdout 可以写入file"""
+        # 进程创建时间在输出时才读取 psutil不计入启动耗时
+        try:
+            import psutil
+            created = psutil.Process().create_time()
+        except Exception:
+            created = None
+        lines = []
+        for name, t in self.marks:
+            process = f'{(t - created) * 1000:8.1f}ms' if created else '       ?'
+            lines.append(f'startup {name:<12} {(t - self.start) * 1000:8.1f}ms  process {process}')
+        for line in lines:
+            print(line)
+        if file:
+            with open(file, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
@@ -12,7 +12,8 @@ class SignalBus(QObject):
     summoner_blue_changed = pyqtSignal(int)  # 蓝色精粹
     summoner_orange_changed = pyqtSignal(int)  # 橙色精粹
 
-    champ_select_changed = pyqtSignal(dict)
+    champ_icon_loaded = pyqtSignal(int, str)  # 英雄id 图标路径
+    champ_icons_progress = pyqtSignal(int, int)  # 已下载 总数
 
 
 signal_bus = SignalBus()
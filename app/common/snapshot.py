@@ -0,0 +1,75 @@
+import asyncio
+import gzip
+import json
+import time
+
+from app.common.utils import write_atomic
+
+SNAPSHOT_FILE = 'app/resource/config/snapshot.json.gz'
+SNAPSHOT_VERSION = 1
+SAVE_DELAY = 1  # 秒 合并短时间内的多次变化
+
+
+class ClientSnapshot:
+    """
+    上次连接客户端时的状态: summoner 玩家信息 / wallet 货币 / champions 英雄列表(Champion.to_row)
+    启动时先用它显示界面并标记为过期 连接客户端后用实时数据覆盖
+    文件为gzip压缩的json {version, saved, ...} 版本不一致时忽略
+    读取 压缩和写文件都在线程中 不阻塞事件循环
+    """
+
+    def __init__(self, file=SNAPSHOT_FILE):
+        self.file = file
+        self.data = {}
+        self.task = None
+
+    async def load(self):
+        """读取成功返回True"""
+        try:
+            data = await asyncio.to_thread(self.__read)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, EOFError) as e:
+            print('snapshot', repr(e))
+            return False
+        if not isinstance(data, dict) or data.get('version') != SNAPSHOT_VERSION:
+            return False
+        self.data = data
+        return True
+
+    def __read(self):
+        with gzip.open(self.file, 'rb') as f:
+            return json.loads(f.read())
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def update(self, key, value):
+        """值为dict时合并到原来的值 有变化时延迟保存"""
+        old = self.data.get(key)
+        if isinstance(value, dict) and isinstance(old, dict):
+            value = {**old, **value}
+        if value == old:
+            return
+        self.data[key] = value
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self.__save_later())
+
+    async def __save_later(self):
+        await asyncio.sleep(SAVE_DELAY)
+        await self.save()
+
+    async def save(self):
+        self.data['version'] = SNAPSHOT_VERSION
+        self.data['saved'] = time.time()
+        text = json.dumps(self.data, ensure_ascii=False, separators=(',', ':'))
+        await asyncio.to_thread(write_atomic, self.file, gzip.compress(text.encode('utf-8')))
+
+    async def flush(self):
+        """退出前保存还未写入的变化"""
+        if self.task and not self.task.done():
+            self.task.cancel()
+            await self.save()
+
+
+snapshot = ClientSnapshot()
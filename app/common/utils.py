@@ -1,37 +1,155 @@
-import subprocess
+import os
+import select
+import time
+from abc import ABC, abstractmethod
+from collections import namedtuple
 
-from psutil import process_iter
+import psutil
 
+LCU_PROCESS_NAME = 'LeagueClientUx.exe'
+GAME_PROCESS_NAME = 'League of Legends.exe'
 
-def get_lcu_process():
-    for process in process_iter():
-        if process.name() == 'LeagueClientUx.exe':
-            yield process
+Lockfile = namedtuple('Lockfile', ['name', 'pid', 'port', 'password', 'protocol'])
 
+credentials = {}  # pid -> (port, token) 由lockfile得到
 
-def is_lcu_process_exist():
-    processes = subprocess.check_output('tasklist /FI "imagename eq League of Legends.exe" /NH', shell=True)
-    return b'League of Legends.exe' in processes
 
+class ProcessDiscovery(ABC):
+    """进程发现后端 子类实现get_pids"""
 
-def get_lcu_pids():
+    @abstractmethod
+    def get_pids(self, name):
+        """名为name的进程 按启动时间排序"""
+
+    def get_lcu_pids(self):
+        return self.get_pids(LCU_PROCESS_NAME)
+
+    def is_game_process_exist(self):
+        return len(self.get_pids(GAME_PROCESS_NAME)) > 0
+
+    def wait_exit(self, pid, timeout):
+        """等待进程退出，最多等待timeout秒，进程已退出返回True"""
+        time.sleep(timeout)
+        return not self.is_alive(pid)
+
+    def is_alive(self, pid):
+        return psutil.pid_exists(pid)
+
+
+class PsutilDiscovery(ProcessDiscovery):
+    """
+    进程内扫描，不创建子进程
+    缓存已知的pid，只读取新出现pid的进程名
+    """
+
+    def __init__(self):
+        self.processes = {}  # pid -> (name, create_time)
+
+    def scan(self):
+        pids = set(psutil.pids())
+        for pid in self.processes.keys() - pids:
+            del self.processes[pid]
+        for pid in pids - self.processes.keys():
+            try:
+                process = psutil.Process(pid)
+                self.processes[pid] = (process.name(), process.create_time())
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                self.processes[pid] = ('', 0)
+
+    def get_pids(self, name):
+        self.scan()
+        # 按启动时间排序 新启动的客户端在后面
+        return [pid for pid, _ in sorted(((pid, t) for pid, (n, t) in self.processes.items() if n == name),
+                                         key=lambda x: x[1])]
+
+    def wait_exit(self, pid, timeout):
+        if hasattr(os, 'pidfd_open'):
+            # linux 通过pidfd获取退出通知
+            try:
+                fd = os.pidfd_open(pid)
+            except OSError:
+                return True
+            try:
+                return len(select.select([fd], [], [], timeout)[0]) > 0
+            finally:
+                os.close(fd)
+        try:
+            # windows 下为 WaitForSingleObject，进程退出立即返回
+            gone, _ = psutil.wait_procs([psutil.Process(pid)], timeout=timeout)
+            return len(gone) > 0
+        except psutil.NoSuchProcess:
+            return True
+
+
+discovery = PsutilDiscovery()
+
+
+def write_atomic(file, data: bytes):
+    """先写临时文件再替换 避免中途退出留下损坏的文件"""
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    tmp = f'{file}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, file)
+
+
+def read_lockfile(path):
+    """lockfile格式 name:pid:port:password:protocol"""
+    with open(path, encoding='utf-8') as f:
+        name, pid, port, password, protocol = f.read().strip().split(':')
+    return Lockfile(name, int(pid), port, password, protocol)
+
+
+class LockfileWatcher:
+    """通过mtime轮询lockfile 每次poll只stat一次 文件变化时才重新读取"""
+
+    def __init__(self, path):
+        self.path = path
+        self.stamp = None
+        self.lockfile = None
+
+    def poll(self):
+        """文件出现/改写/删除时返回True"""
+        try:
+            st = os.stat(self.path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+
+        if stamp == self.stamp:
+            return False
+
+        if stamp is None:
+            self.stamp, self.lockfile = None, None
+            return True
+
+        try:
+            lockfile = read_lockfile(self.path)
+        except (OSError, ValueError):
+            # 客户端还没写完 下次再读
+            return False
+        self.stamp, self.lockfile = stamp, lockfile
+        credentials[lockfile.pid] = (lockfile.port, lockfile.password)
+        return True
+
+
+def get_lcu_credentials(pid):
+    """
+    优先使用lockfile 其次解析命令行参数
+    lockfile由LeagueClient.exe写入 其中的pid是LeagueClientUx.exe的父进程
+    pid不匹配时为上次客户端崩溃留下的旧文件
+    """
+    if pid in credentials:
+        return credentials[pid]
+    process = psutil.Process(pid)
     try:
-        processes = subprocess.check_output(
-            'tasklist /FI "imagename eq LeagueClientUx.exe" /NH',
-            shell=True,
-            stderr=subprocess.STDOUT
-        )
-    except subprocess.CalledProcessError as e:
-        raise e
-    pids = []
-    if not b'LeagueClientUx.exe' in processes:
-        return pids
-
-    arr = processes.split()
-    for i, s in enumerate(arr):
-        if s == b'LeagueClientUx.exe':
-            pids.append(int(arr[i + 1]))
-    return pids
+        lockfile = read_lockfile(os.path.join(os.path.dirname(process.exe()), 'lockfile'))
+        if lockfile.pid in (pid, process.ppid()):
+            credentials[pid] = (lockfile.port, lockfile.password)
+            return credentials[pid]
+    except (OSError, ValueError, psutil.Error):
+        pass
+    return get_port_token(process)
 
 
 def get_port_token(process):
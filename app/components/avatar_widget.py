@@ -1,8 +1,10 @@
-from PyQt6.QtCore import QRectF, Qt, QSize
-from PyQt6.QtGui import QPainter, QPen, QPixmap, QFont, QPainterPath
+from PyQt6.QtCore import QRectF, Qt
+from PyQt6.QtGui import QPainter, QPen, QFont
 from PyQt6.QtWidgets import QWidget
 from qfluentwidgets import ProgressRing, isDarkTheme, themeColor, ToolTipFilter, ToolTipPosition
 
+from app.common.pixmap_cache import round_pixmap
+
 
 class ProgressArc(ProgressRing):
     def __init__(self, parent=None, useAni=True, text="", fontSize=10):
@@ -59,8 +61,6 @@ class AvatarWidget(QWidget):
         self.sep = .3 * diameter
         self.iconPath = icon
 
-        self.image = QPixmap(self.iconPath)
-
         self.setFixedSize(self.diameter, self.diameter)
 
         self.xpSinceLastLevel = xpSinceLastLevel
@@ -84,38 +84,17 @@ class AvatarWidget(QWidget):
             self.paintXpSinceLastLevel = self.xpSinceLastLevel
             self.callUpdate = False
 
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-        size = (self.size() - QSize(int(self.sep), int(self.sep))) * \
-               self.devicePixelRatioF()
-
-        image = self.image
-
-        try:
-            # if 'champion' in self.iconPath:
-            width = image.width() - 10
-            height = image.height() - 10
-            image = image.copy(5, 5, width, height)
-
-            scaledImage = image.scaled(size, Qt.AspectRatioMode.KeepAspectRatioByExpanding,
-                                       Qt.TransformationMode.SmoothTransformation)
-
-            clipPath = QPainterPath()
+        if not self.iconPath:
+            return
 
-            rect = QRectF(self.sep // 2, self.sep // 2,
-                          self.width() - self.sep,
-                          self.height() - self.sep)
-            clipPath.addEllipse(rect)
+        image = round_pixmap(self.iconPath, 5, int(self.width() - self.sep), int(self.height() - self.sep),
+                             self.devicePixelRatioF(), expanding=True)
 
-            painter.setClipPath(clipPath)
-            painter.drawPixmap(rect.toRect(), scaledImage)
-        except:
-            pass
+        painter = QPainter(self)
+        painter.drawPixmap(int(self.sep // 2), int(self.sep // 2), image)
 
     def updateIcon(self, icon: str, xpSinceLastLevel=None, xpUntilNextLevel=None, text=""):
         self.iconPath = icon
-        self.image = QPixmap(self.iconPath)
 
         if xpSinceLastLevel is not None and xpUntilNextLevel is not None:
             self.xpSinceLastLevel = xpSinceLastLevel
@@ -1,9 +1,13 @@
-from PyQt6.QtCore import pyqtSlot, pyqtSignal, Qt, QSize
-from PyQt6.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QLabel
-from qfluentwidgets import SmoothScrollArea, FlowLayout, SearchLineEdit, TransparentToolButton, FluentIcon
+from PyQt6.QtCore import pyqtSlot, pyqtSignal, Qt, QSize, QAbstractListModel, QModelIndex
+from PyQt6.QtGui import QPainter
+from PyQt6.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QLabel, QListView, QStyledItemDelegate, QStyle, \
+    QAbstractItemView
+from qfluentwidgets import SearchLineEdit, TransparentToolButton, FluentIcon, SmoothScrollDelegate
 
+from app.common.pixmap_cache import round_pixmap
 from app.components.draggable_widget import DraggableItem, ItemsDraggableWidget
-from app.components.round_widget import RoundIcon, RoundIconButton
+from app.components.round_widget import RoundIcon
+from app.lol.catalog import ChampionCatalog
 
 
 class ChampionTabItem(DraggableItem):
@@ -70,8 +74,100 @@ class ChampionDraggableWidget(ItemsDraggableWidget):
         return [item.championId for item in self.items]
 
 
+class ChampListModel(QAbstractListModel):
+    ChampRole = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, champs, parent=None):
+        super().__init__(parent)
+        self.champs = []
+        self.setChamps(champs)
+
+    def setChamps(self, champs):
+        self.beginResetModel()
+        self.champs = [champ for champ in champs if champ.id != -1]
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.champs)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        champ = self.champs[index.row()]
+        if role == self.ChampRole:
+            return champ
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return champ.name
+        return None
+
+
+class ChampItemDelegate(QStyledItemDelegate):
+    """绘制圆形英雄图标 图标在第一次绘制时才解码"""
+
+    def __init__(self, parent=None, diameter=38, overscaled=4, borderWidth=2, spacing=6):
+        super().__init__(parent)
+        self.diameter = diameter
+        self.overscaled = overscaled
+        self.borderWidth = borderWidth
+        self.spacing = spacing
+        self.pressedRow = -1
+
+    def sizeHint(self, option, index):
+        return QSize(self.diameter + self.spacing, self.diameter + self.spacing)
+
+    def paint(self, painter: QPainter, option, index):
+        champ = index.data(ChampListModel.ChampRole)
+        image = round_pixmap(champ.icon, self.overscaled, self.diameter, self.diameter,
+                             painter.device().devicePixelRatioF(), border=self.borderWidth)
+
+        painter.save()
+        if index.row() == self.pressedRow:
+            painter.setOpacity(0.63)
+        elif option.state & QStyle.StateFlag.State_MouseOver:
+            painter.setOpacity(0.80)
+        rect = option.rect
+        painter.drawPixmap(rect.x() + (rect.width() - self.diameter) // 2,
+                           rect.y() + (rect.height() - self.diameter) // 2, image)
+        painter.restore()
+
+
+class ChampListView(QListView):
+    """只绘制可见的英雄图标"""
+    champClicked = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.champDelegate = ChampItemDelegate(self)
+        self.scrollDelegate = SmoothScrollDelegate(self)
+
+        self.setItemDelegate(self.champDelegate)
+        self.setViewMode(QListView.ViewMode.IconMode)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setMovement(QListView.Movement.Static)
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setMouseTracking(True)
+        self.setStyleSheet('QListView { background: transparent; border: none; }')
+
+        self.pressed.connect(self.__on_pressed)
+        self.clicked.connect(self.__on_clicked)
+
+    def __on_pressed(self, index):
+        self.champDelegate.pressedRow = index.row()
+        self.viewport().update()
+
+    def __on_clicked(self, index):
+        self.champClicked.emit(index.data(ChampListModel.ChampRole))
+
+    def mouseReleaseEvent(self, e):
+        super().mouseReleaseEvent(e)
+        self.champDelegate.pressedRow = -1
+        self.viewport().update()
+
+
 class ChampSelectWidget(QWidget):
-    def __init__(self, champs, selected, parent=None):
+    def __init__(self, champs: ChampionCatalog, selected, parent=None):
         super().__init__(parent)
         self.champs = champs
         self.selected_list = selected
@@ -83,45 +179,39 @@ class ChampSelectWidget(QWidget):
         self.champ_select_layout = QVBoxLayout(self.champ_select_widget)
         self.search_line_edit = SearchLineEdit()
 
-        self.champs_scroll_area = SmoothScrollArea()
-        self.champs_scroll_area.setFixedSize(300, 295)
-        self.champs_widget = QWidget()
-        self.champs_layout = FlowLayout(needAni=True, isTight=True)
+        self.champs_model = ChampListModel(champs)
+        self.champs_view = ChampListView()
+        self.champs_view.setFixedSize(300, 295)
 
         self.__init_layout()
         self.__init_widget()
 
     def __init_layout(self):
-        self.champs_widget.setLayout(self.champs_layout)
-
-        self.champs_scroll_area.setWidget(self.champs_widget)
-        self.champs_scroll_area.setWidgetResizable(True)
-
         self.champ_select_layout.setContentsMargins(0, 0, 0, 0)
         self.champ_select_layout.addWidget(self.search_line_edit)
-        self.champ_select_layout.addWidget(self.champs_scroll_area)
+        self.champ_select_layout.addWidget(self.champs_view)
 
         self.box.addWidget(self.selected_widget)
         self.box.addWidget(self.champ_select_widget)
 
     def __init_widget(self):
 
-        for id in self.selected_list:
-            champ = [champ for champ in self.champs if champ['id'] == id][0]
-            name = champ['name']
-            icon = champ['icon']
-            self.selected_widget.addItem(icon, name, id)
+        for champ in self.champs.lookup(self.selected_list):
+            self.selected_widget.addItem(champ.icon, champ.name, champ.id)
         self.selected_widget.setStyleSheet('background-color: rgba(245, 245, 245, 0.667);')
 
-        for champ in self.champs:
-            if champ['id'] != -1:
-                btn = RoundIconButton(champ)
-                btn.clicked.connect(self.__on_icon_clicked)
-                self.champs_layout.addWidget(btn)
+        self.champs_view.setModel(self.champs_model)
+        self.champs_view.champClicked.connect(self.__on_icon_clicked)
+        self.search_line_edit.setPlaceholderText('名称 / 别名 / 拼音 / 分路')
+        self.search_line_edit.textChanged.connect(self.__on_search_text_changed)
+
+    @pyqtSlot(str)
+    def __on_search_text_changed(self, text):
+        self.champs_model.setChamps(self.champs.search(text))
 
-    @pyqtSlot(dict)
+    @pyqtSlot(object)
     def __on_icon_clicked(self, champ):
-        self.selected_widget.addItem(champ['icon'], champ['name'], champ['id'])
+        self.selected_widget.addItem(champ.icon, champ.name, champ.id)
 
     def get_selected_champ_ids(self):
         return self.selected_widget.getCurrentChampionIds()
@@ -0,0 +1,45 @@
+from PyQt6.QtCore import Qt, QEvent, QTimer
+from PyQt6.QtWidgets import QLabel
+
+from app.common.profiler import LoopProfiler
+
+
+STYLE = 'background: rgba(0, 0, 0, 160); color: {}; padding: 2px 6px; font: 12px Consolas;'
+
+
+class LagOverlay(QLabel):
+    """调试用 显示在父窗口右上角的事件循环延迟 超过阈值时变红"""
+
+    def __init__(self, profiler: LoopProfiler, parent=None):
+        super().__init__(parent=parent)
+        self.profiler = profiler
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(500)
+        self.refresh()
+
+        if parent:
+            parent.installEventFilter(self)
+
+    def eventFilter(self, obj, e: QEvent):
+        if obj is self.parent():
+            if e.type() == QEvent.Type.Resize:
+                self.__move_to_corner()
+            elif e.type() == QEvent.Type.ChildAdded:
+                self.raise_()
+        return super().eventFilter(obj, e)
+
+    def refresh(self):
+        stats = self.profiler.stats()
+        self.setStyleSheet(STYLE.format('#ff6060' if stats['lag_ms'] > self.profiler.threshold * 1000 else 'white'))
+        self.setText(f"lag {stats['lag_ms']:.1f}ms  p99 {stats['p99_lag_ms']:.1f}ms  max {stats['max_lag_ms']:.0f}ms  "
+                     f"stalls {stats['stalls']}")
+        self.adjustSize()
+        self.__move_to_corner()
+        self.raise_()
+
+    def __move_to_corner(self):
+        if self.parent():
+            self.move(self.parent().width() - self.width() - 4, 4)
@@ -1,13 +1,15 @@
-from PyQt6.QtCore import pyqtSignal, Qt, QEvent
-from PyQt6.QtGui import QPixmap, QPainterPath, QPainter, QPen, QColor, QMouseEvent
+from PyQt6.QtCore import pyqtSignal, QEvent
+from PyQt6.QtGui import QPainter, QMouseEvent
 from PyQt6.QtWidgets import QFrame
 
+from app.common.pixmap_cache import round_pixmap
+
 
 class RoundIcon(QFrame):
     def __init__(self, icon=None, diameter=26, overscaled=2,
                  borderWidth=2, drawBackground=False, enabled=True, parent=None) -> None:
         super().__init__(parent)
-        self.image = QPixmap(icon)
+        self.icon = icon
 
         self.overscaled = overscaled
         self.borderWidth = borderWidth
@@ -22,48 +24,19 @@ class RoundIcon(QFrame):
         if not self.havePic:
             return
 
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-        width = self.image.width() - 2 * self.overscaled
-        height = self.image.height() - 2 * self.overscaled
-
-        image = self.image.copy(
-            self.overscaled, self.overscaled, width, height)
-
-        size = self.size() * self.devicePixelRatioF()
-        image: QPixmap = image.scaled(size,
-                                      Qt.AspectRatioMode.KeepAspectRatio,
-                                      Qt.TransformationMode.SmoothTransformation)
-
-        path = QPainterPath()
-        path.addEllipse(0, 0, self.width(), self.height())
-
-        painter.setClipPath(path)
+        image = round_pixmap(self.icon, self.overscaled, self.width(), self.height(), self.devicePixelRatioF(),
+                             background=self.drawBackground, border=self.borderWidth if self.enabled else 0)
 
+        painter = QPainter(self)
         if not self.enabled:
             painter.setOpacity(0.15)
-
-        if self.drawBackground:
-            painter.save()
-            painter.setBrush(QColor(0, 0, 0))
-            painter.drawEllipse(0, 0, self.width(), self.height())
-            painter.restore()
-
-        painter.drawPixmap(self.rect(), image)
-
-        if self.borderWidth != 0 and self.enabled:
-            painter.save()
-            painter.setPen(
-                QPen(QColor(120, 90, 40), self.borderWidth, Qt.PenStyle.SolidLine))
-            painter.drawEllipse(0, 0, self.width(), self.height())
-            painter.restore()
+        painter.drawPixmap(0, 0, image)
 
         return super().paintEvent(event)
 
     def setIcon(self, icon):
         self.havePic = True
-        self.image = QPixmap(icon)
+        self.icon = icon
 
         self.repaint()
 
@@ -74,18 +47,18 @@ class RoundIcon(QFrame):
 
 
 class RoundIconButton(QFrame):
-    clicked = pyqtSignal(dict)
+    clicked = pyqtSignal(object)
 
     def __init__(self, champ, diameter=38, overscaled=4, borderWidth=2, parent=None) -> None:
         super().__init__(parent)
         self.champ = champ
-        self.image = QPixmap(champ['icon'])
+        self.icon = champ.icon
 
         self.borderWidth = borderWidth
         self.overscaled = overscaled
 
-        self.championName: str = champ['name']
-        self.championId = champ['id']
+        self.championName: str = champ.name
+        self.championId = champ.id
 
         self.isPressed = False
         self.isHover = False
@@ -93,24 +66,10 @@ class RoundIconButton(QFrame):
         self.setFixedSize(diameter, diameter)
 
     def paintEvent(self, event) -> None:
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-        path = QPainterPath()
-        path.addEllipse(0, 0, self.width(), self.height())
-        painter.setClipPath(path)
-
-        width = self.image.width() - 2 * self.overscaled
-        height = self.image.height() - 2 * self.overscaled
-
-        image = self.image.copy(
-            self.overscaled, self.overscaled, width, height)
-
-        size = self.size() * self.devicePixelRatioF()
-        image = image.scaled(size,
-                             Qt.AspectRatioMode.KeepAspectRatio,
-                             Qt.TransformationMode.SmoothTransformation)
+        image = round_pixmap(self.icon, self.overscaled, self.width(), self.height(), self.devicePixelRatioF(),
+                             border=self.borderWidth)
 
+        painter = QPainter(self)
         if self.isPressed:
             painter.setOpacity(0.63)
         elif self.isHover:
@@ -118,11 +77,7 @@ class RoundIconButton(QFrame):
         else:
             painter.setOpacity(1)
 
-        painter.drawPixmap(self.rect(), image)
-
-        painter.setPen(
-            QPen(QColor(120, 90, 40), self.borderWidth, Qt.PenStyle.SolidLine))
-        painter.drawEllipse(0, 0, self.width(), self.height())
+        painter.drawPixmap(0, 0, image)
 
         return super().paintEvent(event)
 
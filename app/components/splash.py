@@ -1,25 +1,29 @@
 # coding:utf-8
-from typing import Union
-import sys
-
-from PyQt6.QtCore import Qt, QSize, QRectF, QEvent
-from PyQt6.QtGui import QPixmap, QPainter, QColor, QIcon
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QGraphicsDropShadowEffect
-from qfluentwidgets import FluentIconBase, FluentStyleSheet, isDarkTheme, IndeterminateProgressRing
-from qfluentwidgets.common.icon import toQIcon
-from qfluentwidgets.components.widgets.flyout import IconWidget
-
-# from ..common.icon import FluentIconBase, drawIcon, toQIcon
-# from ..common.style_sheet import isDarkTheme, FluentStyleSheet
-# from ..components.widgets import IconWidget
-from qframelesswindow import TitleBar
+from PyQt6.QtCore import Qt, QEvent
+from PyQt6.QtGui import QPainter, QColor
+from PyQt6.QtWidgets import QWidget, QGraphicsDropShadowEffect
 
 
 class SplashScreen(QWidget):
-    """ Splash screen """
+    """
+    Splash screen
+    只依赖PyQt6 启动时在导入配置和qfluentwidgets之前就能显示 之后再调用show_progress加上进度环
+    """
 
     def __init__(self, parent=None, enableShadow=True):
         super().__init__(parent=parent)
+        self.enableShadow = enableShadow
+        self.progress_ring = None
+        self.dark = False
+
+        if parent:
+            parent.installEventFilter(self)
+
+    def show_progress(self):
+        """加上进度环并按主题重绘背景 会导入qfluentwidgets 需在load_config之后调用"""
+        from qfluentwidgets import isDarkTheme, IndeterminateProgressRing
+
+        self.dark = isDarkTheme()
         self.progress_ring = IndeterminateProgressRing(self, Qt.AlignmentFlag.AlignCenter)
 
         self.shadowEffect = QGraphicsDropShadowEffect(self)
@@ -28,11 +32,11 @@ class SplashScreen(QWidget):
         self.shadowEffect.setBlurRadius(15)
         self.shadowEffect.setOffset(0, 4)
 
-        if enableShadow:
+        if self.enableShadow:
             self.progress_ring.setGraphicsEffect(self.shadowEffect)
-
-        if parent:
-            parent.installEventFilter(self)
+        self.resizeEvent(None)
+        self.progress_ring.show()
+        self.update()
 
     def eventFilter(self, obj, e: QEvent):
         if obj is self.parent():
@@ -44,6 +48,8 @@ class SplashScreen(QWidget):
         return super().eventFilter(obj, e)
 
     def resizeEvent(self, e):
+        if self.progress_ring is None:
+            return
         self.progress_ring.move(self.width() // 2 - self.progress_ring.width() // 2,
                                 self.height() // 2 - self.progress_ring.height() // 2)
 
@@ -56,6 +62,6 @@ class SplashScreen(QWidget):
         painter.setPen(Qt.PenStyle.NoPen)
 
         # draw background
-        c = 32 if isDarkTheme() else 255
+        c = 32 if self.dark else 255
         painter.setBrush(QColor(c, c, c))
         painter.drawRect(self.rect())
@@ -0,0 +1,98 @@
+import asyncio
+import hashlib
+import json
+import os
+
+from app.common.utils import write_atomic
+from app.lol.decoder import loads
+
+CACHE_DIR = 'app/resource/game/data'
+
+
+def is_error_body(data):
+    """客户端的错误响应 {'errorCode': ..., 'httpStatus': 404, 'message': ...}"""
+    return isinstance(data, dict) and 'errorCode' in data and 'httpStatus' in data
+
+
+class GameDataCache:
+    """
+    /lol-game-data/* json的磁盘缓存
+    以客户端游戏版本为key 同一版本直接读本地 版本变化后用ETag/Last-Modified向客户端校验
+    """
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+        self.index_file = os.path.join(directory, 'index.json')
+        self.index = None  # path -> {version, etag, last_modified}
+        self.memory = {}  # path -> (version, data)
+
+    async def __load_index(self):
+        if self.index is None:
+            self.index = await asyncio.to_thread(self.__read_index)
+
+    def __read_index(self):
+        try:
+            with open(self.index_file, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    async def __save_index(self):
+        data = json.dumps(self.index, ensure_ascii=False).encode('utf-8')
+        await asyncio.to_thread(write_atomic, self.index_file, data)
+
+    def __file(self, path):
+        return os.path.join(self.directory, hashlib.sha1(path.encode()).hexdigest()[:16] + '.json')
+
+    async def get(self, path, version):
+        """版本一致时返回缓存的数据 否则返回None"""
+        if path in self.memory and self.memory[path][0] == version:
+            return self.memory[path][1]
+
+        await self.__load_index()
+        entry = self.index.get(path)
+        if not entry or entry['version'] != version:
+            return None
+        return await self.__read(path, version)
+
+    async def __read(self, path, version):
+        try:
+            data = loads(await asyncio.to_thread(self.__read_bytes, self.__file(path)))
+        except (OSError, ValueError):
+            return None
+        if is_error_body(data):
+            # get_game_data只缓存200的响应 但磁盘上的文件可能来自别处(手动复制 其他工具) 当作未缓存
+            return None
+        self.memory[path] = (version, data)
+        return data
+
+    @staticmethod
+    def __read_bytes(file):
+        with open(file, 'rb') as f:
+            return f.read()
+
+    async def validators(self, path):
+        """条件请求头"""
+        await self.__load_index()
+        entry = self.index.get(path, {})
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    async def revalidate(self, path, version):
+        """客户端返回304 旧数据在新版本下仍然有效"""
+        self.index[path]['version'] = version
+        await self.__save_index()
+        return await self.__read(path, version)
+
+    async def put(self, path, version, body: bytes, etag=None, last_modified=None):
+        await self.__load_index()
+        await asyncio.to_thread(write_atomic, self.__file(path), body)
+        self.index[path] = {'version': version, 'etag': etag, 'last_modified': last_modified}
+        await self.__save_index()
+        data = loads(body)
+        self.memory[path] = (version, data)
+        return data
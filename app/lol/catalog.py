@@ -0,0 +1,126 @@
+from functools import cache
+
+
+@cache
+def _pinyin_converter():
+    """pypinyin导入较慢(约80ms) 第一次建立索引时才导入 未安装返回None"""
+    try:
+        from pypinyin import lazy_pinyin
+    except ImportError:
+        return None
+    return lazy_pinyin
+
+
+def _substrings(text):
+    return {text[i:j] for i in range(len(text)) for j in range(i + 1, len(text) + 1)}
+
+
+def _prefixes(text):
+    return {text[:i] for i in range(1, len(text) + 1)}
+
+
+def _pinyin_terms(name):
+    """全拼和首字母 可以从任意一个字开始匹配 如 疾风剑豪 -> jifengjianhao fengjianhao jfjh fjh"""
+    lazy_pinyin = _pinyin_converter()
+    if lazy_pinyin is None:
+        return set()
+    syllables = [s.lower() for s in lazy_pinyin(name) if s.isalpha()]
+    initials = [s[0] for s in syllables]
+    terms = set()
+    for i in range(len(syllables)):
+        terms |= _prefixes(''.join(syllables[i:]))
+        terms |= _prefixes(''.join(initials[i:]))
+    return terms
+
+
+class Champion:
+    """英雄记录 用__slots__减少内存 分路为集合"""
+    __slots__ = ('id', 'name', 'alias', 'icon_path', 'roles', 'icon')
+
+    def __init__(self, id, name, alias, icon_path='', roles=(), icon=''):
+        self.id = id
+        self.name = name
+        self.alias = alias
+        self.icon_path = icon_path
+        self.roles = frozenset(roles)
+        self.icon = icon
+
+    def __repr__(self):
+        return f'Champion({self.id}, {self.name!r}, {self.alias!r})'
+
+    def to_row(self):
+        """Champion(*row) 可以还原"""
+        return [self.id, self.name, self.alias, self.icon_path, sorted(self.roles), self.icon]
+
+
+class ChampionCatalog:
+    """
+    英雄列表及索引 保持加入顺序
+    id 别名 分路 直接查字典
+    搜索: 名称和别名按任意子串 拼音(需要pypinyin)和分路按前缀 建立 词 -> 英雄下标 的倒排表
+    一个词只需一次字典查找
+    """
+
+    def __init__(self, champs=()):
+        self.champs = list(champs)
+        self.ids = {champ.id: champ for champ in self.champs}
+        self.aliases = {champ.alias.lower(): champ for champ in self.champs}
+        self.roles = {}
+        for champ in self.champs:
+            for role in champ.roles:
+                self.roles.setdefault(role, []).append(champ)
+        self.index = self.__build_index()
+
+    def __build_index(self):
+        postings = {}
+        for i, champ in enumerate(self.champs):
+            terms = _substrings(champ.name.lower()) | _substrings(champ.alias.lower()) | _pinyin_terms(champ.name)
+            for role in champ.roles:
+                terms |= _prefixes(role.lower())
+            for term in terms:
+                postings.setdefault(term, []).append(i)
+        # 下标按加入顺序递增 已有序
+        return {term: tuple(ids) for term, ids in postings.items()}
+
+    def __iter__(self):
+        return iter(self.champs)
+
+    def __len__(self):
+        return len(self.champs)
+
+    def __contains__(self, champ_id):
+        return champ_id in self.ids
+
+    def get(self, champ_id):
+        return self.ids.get(champ_id)
+
+    def by_alias(self, alias):
+        return self.aliases.get(alias.lower())
+
+    def with_role(self, role):
+        return self.roles.get(role, [])
+
+    def lookup(self, champ_ids):
+        """按给定顺序返回英雄 不存在的id跳过"""
+        return [self.ids[champ_id] for champ_id in champ_ids if champ_id in self.ids]
+
+    def icons(self, champ_ids):
+        return [champ.icon for champ in self.lookup(champ_ids)]
+
+    def search(self, text):
+        """按名称 别名 拼音 分路搜索 多个关键字用空格分隔 返回的英雄保持原有顺序"""
+        words = text.lower().split()
+        if not words:
+            return self.champs
+
+        result = None
+        for word in words:
+            ids = self.index.get(word, ())
+            if result is None:
+                result = ids
+            else:
+                ids = set(ids)
+                result = [i for i in result if i in ids]
+            if not result:
+                return []
+        return [self.champs[i] for i in result]
@@ -0,0 +1,165 @@
+import asyncio
+import random
+
+from app.common.config import cfg
+from app.lol.policy import LcuError
+
+# 先亮起再锁定时 亮起后等待的秒数 让队友看到
+BAN_HOVER_SECONDS = 2
+
+
+class SessionState:
+    """从英雄选择session中取出自动选择需要的部分 英雄都用集合保存"""
+    __slots__ = ('game_id', 'local_cell_id', 'action', 'bans', 'picks', 'intents', 'ban_intents')
+
+    def __init__(self, session):
+        self.game_id = session.get('gameId')
+        self.local_cell_id = session['localPlayerCellId']
+        # 本地玩家当前可操作的action
+        self.action = None
+        self.bans = set(session['bans']['myTeamBans']) | set(session['bans']['theirTeamBans'])
+        # 其他玩家已选(含亮起)的英雄
+        self.picks = set()
+        # 队友亮起还未锁定的禁用
+        self.ban_intents = set()
+        for turn in session['actions']:
+            for action in turn:
+                champ_id = action['championId']
+                if action['actorCellId'] == self.local_cell_id:
+                    if action['isInProgress'] and not action['completed']:
+                        self.action = action
+                elif champ_id > 0:
+                    if action['type'] != 'ban':
+                        self.picks.add(champ_id)
+                    elif action['completed']:
+                        self.bans.add(champ_id)
+                    elif action['isAllyAction']:
+                        self.ban_intents.add(champ_id)
+        # 队友预选
+        self.intents = {member['championPickIntent'] for member in session['myTeam']
+                        if member['cellId'] != self.local_cell_id and member['championPickIntent'] > 0}
+        self.bans.discard(0)
+
+    def unavailable(self, action_type):
+        """pick: 已禁用和被其他人选择的英雄 ban: 另外排除队友已亮起的禁用"""
+        unavailable = self.bans | self.picks | self.intents
+        if action_type == 'ban':
+            unavailable |= self.ban_intents
+        return unavailable
+
+
+class ChampSelectEngine:
+    """
+    接收websocket推送的英雄选择session 与上一次的状态比较
+    只在轮到自己操作(新的action)时发送pick/ban请求
+    只亮起未锁定时 若所选英雄被禁用或被其他人选走则换一个
+    请求失败或被客户端拒绝时撤销记录 下一次推送换下一个英雄重试
+    """
+
+    def __init__(self, lcu):
+        self.lcu = lcu
+        self.state = None
+        # action id -> 已提交的英雄id
+        self.handled = {}
+        # 已锁定的action 不再更换
+        self.locked = set()
+        # action id -> 请求失败或被拒绝的英雄
+        self.rejected = {}
+
+    def reset(self):
+        self.state = None
+        self.handled.clear()
+        self.locked.clear()
+        self.rejected.clear()
+
+    async def update(self, session):
+        state = SessionState(session)
+        prev, self.state = self.state, state
+        if prev is not None and prev.game_id != state.game_id:
+            self.handled.clear()
+            self.locked.clear()
+            self.rejected.clear()
+
+        action = state.action
+        if action is None or action['type'] not in ('pick', 'ban'):
+            return
+
+        action_id, action_type = action['id'], action['type']
+        unavailable = state.unavailable(action_type) | self.rejected.get(action_id, set())
+        rehover = action_id in self.handled
+        if rehover:
+            # 同一个action 只有亮起的英雄变得不可用时才重新选择
+            champ_id = self.handled[action_id]
+            if champ_id is None or prev is None or action_id in self.locked \
+                    or champ_id not in unavailable - prev.unavailable(action_type):
+                return
+        elif action['championId'] > 0:
+            # 已手动亮起 不覆盖
+            self.handled[action_id] = None
+            return
+
+        if action_type == 'pick':
+            champ_id = self.choose(cfg.wantSelectChamps.value, unavailable)
+            # 先记录再请求 请求期间到达的推送不会重复发送
+            self.handled[action_id] = champ_id
+            if champ_id is not None:
+                lock = cfg.enableAutoSelect.value
+                if lock:
+                    self.locked.add(action_id)
+                await self.__send(self.lcu.select_champ, action_id, champ_id, lock)
+        else:
+            await self.__ban(action_id, unavailable, rehover)
+
+    async def __ban(self, action_id, unavailable, rehover):
+        # 禁用列表有优先级 取第一个可用的
+        champ_id = self.choose(cfg.wantBanChamps.value, unavailable, ordered=True)
+        self.handled[action_id] = champ_id
+        if champ_id is None:
+            return
+
+        lock = cfg.enableAutoBan.value
+        if rehover:
+            # 只可能是未锁定或正在先亮起等待 锁定由第一次的调用完成
+            await self.__send(self.lcu.ban_champ, action_id, champ_id)
+            return
+        if not (lock and cfg.banHoverFirst.value):
+            if lock:
+                self.locked.add(action_id)
+            await self.__send(self.lcu.ban_champ, action_id, champ_id, lock)
+            return
+
+        if not await self.__send(self.lcu.ban_champ, action_id, champ_id):
+            return
+        await asyncio.sleep(BAN_HOVER_SECONDS)
+
+        # 等待期间的推送已更新状态 按最新状态锁定 期间手动换了英雄则锁定手动选择的
+        state = self.state
+        if state is None or state.action is None or state.action['id'] != action_id:
+            return
+        champ_id = state.action['championId']
+        unavailable = state.unavailable('ban') | self.rejected.get(action_id, set())
+        if champ_id <= 0 or champ_id in unavailable:
+            champ_id = self.choose(cfg.wantBanChamps.value, unavailable, ordered=True)
+        if champ_id is not None:
+            self.handled[action_id] = champ_id
+            self.locked.add(action_id)
+            await self.__send(self.lcu.ban_champ, action_id, champ_id, True)
+
+    async def __send(self, request, action_id, champ_id, completed=False):
+        """发送pick/ban 失败时撤销这个action的记录并记下英雄 返回是否成功"""
+        try:
+            await request(action_id, champ_id, completed)
+            return True
+        except LcuError as e:
+            print(f'action {action_id} champ {champ_id} 失败: {e!r}')
+            self.handled.pop(action_id, None)
+            self.locked.discard(action_id)
+            self.rejected.setdefault(action_id, set()).add(champ_id)
+            return False
+
+    @staticmethod
+    def choose(wanted, unavailable, ordered=False):
+        available = [champ_id for champ_id in wanted if champ_id not in unavailable]
+        if not available:
+            return None
+        return available[0] if ordered else random.choice(available)
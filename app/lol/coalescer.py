@@ -0,0 +1,58 @@
+import asyncio
+
+
+class EventCoalescer:
+    """
+    websocket事件到Qt信号之间的合并层 每个uri一个策略
+    window为0: 每个事件都发出(如游戏状态)
+    window>0: 第一个事件立即发出，之后window毫秒内只保留最新值，到期后发出(如英雄选择session、钱包)
+    """
+
+    def __init__(self, policies=None):
+        self.windows = dict(policies or {})  # uri -> 毫秒
+        self.pending = {}  # uri -> (signal, value)
+        self.timers = {}  # uri -> TimerHandle
+        self.received = 0
+        self.emitted = 0
+        self.merged = 0
+
+    def set_policy(self, uri, window):
+        self.windows[uri] = window
+
+    def emit(self, uri, signal, value):
+        self.received += 1
+        window = self.windows.get(uri, 0)
+        if window <= 0:
+            self.__emit(signal, value)
+            return
+
+        if uri in self.timers:
+            if uri in self.pending:
+                self.merged += 1
+            self.pending[uri] = (signal, value)
+            return
+
+        self.__emit(signal, value)
+        self.timers[uri] = asyncio.get_running_loop().call_later(window / 1000, self.__flush, uri)
+
+    def __flush(self, uri):
+        self.timers.pop(uri, None)
+        if uri in self.pending:
+            # 窗口内有新值 发出并开始下一个窗口
+            signal, value = self.pending.pop(uri)
+            self.__emit(signal, value)
+            window = self.windows.get(uri, 0)
+            self.timers[uri] = asyncio.get_running_loop().call_later(window / 1000, self.__flush, uri)
+
+    def __emit(self, signal, value):
+        self.emitted += 1
+        signal.emit(value)
+
+    def cancel(self):
+        for timer in self.timers.values():
+            timer.cancel()
+        self.timers.clear()
+        self.pending.clear()
+
+    def stats(self):
+        return {'received': self.received, 'emitted': self.emitted, 'merged': self.merged}
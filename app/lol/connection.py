@@ -0,0 +1,55 @@
+import asyncio
+import ssl
+
+import aiohttp
+from aiohttp import BasicAuth
+
+headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
+
+# 客户端使用自签名证书 所有连接共用一个不校验证书的ssl上下文
+ssl_context = ssl.create_default_context()
+ssl_context.check_hostname = False
+ssl_context.verify_mode = ssl.CERT_NONE
+
+# 连接池大小 websocket固定占用一个
+POOL_LIMIT = 16
+# 空闲连接保留的秒数 客户端一侧也会关闭空闲连接 所以寻找对局时还需要Lcu定期重新使用
+KEEPALIVE_TIMEOUT = 120
+
+
+class LcuConnection:
+    """REST与websocket共用的连接池"""
+
+    def __init__(self, port, token, limit_per_host=POOL_LIMIT, keepalive_timeout=None):
+        keepalive_timeout = keepalive_timeout or KEEPALIVE_TIMEOUT
+        self.port = port
+        self.token = token
+        self.base_url = f'https://127.0.0.1:{port}'
+        connector = aiohttp.TCPConnector(limit_per_host=limit_per_host,
+                                         keepalive_timeout=keepalive_timeout,
+                                         ssl=ssl_context)
+        self.session = aiohttp.ClientSession(base_url=self.base_url, connector=connector,
+                                             auth=BasicAuth('riot', token), headers=headers)
+
+    def request(self, method, path, **kwargs):
+        return self.session.request(method, path, **kwargs)
+
+    async def ws_connect(self):
+        return await self.session.ws_connect('/')
+
+    async def prewarm(self, count=2, path='/lol-matchmaking/v1/ready-check'):
+        """提前建立count个keep-alive连接 避免之后的请求再做TCP+TLS握手"""
+
+        async def touch():
+            async with self.session.get(path) as resp:
+                await resp.read()
+
+        await asyncio.gather(*(touch() for _ in range(count)), return_exceptions=True)
+
+    @property
+    def closed(self):
+        return self.session.closed
+
+    async def close(self):
+        if not self.session.closed:
+            await self.session.close()
@@ -0,0 +1,75 @@
+import json
+
+try:
+    import orjson
+
+    loads = orjson.loads
+except ImportError:
+    try:
+        import msgspec
+
+        loads = msgspec.json.decode
+    except ImportError:
+        loads = json.loads
+
+URI_KEY = '"uri":'
+
+
+def peek_uri(text):
+    """
+    不解析整个帧取出uri
+    客户端推送的帧为 [8,"event",{"data":...,"eventType":"Update","uri":"/xxx"}] uri位于末尾
+    格式不符时返回None
+    """
+    start = text.rfind(URI_KEY)
+    if start == -1:
+        return None
+    start += len(URI_KEY)
+    while text[start:start + 1] == ' ':
+        start += 1
+    if text[start:start + 1] != '"':
+        return None
+    start += 1
+    end = text.find('"', start)
+    if end == -1 or text[end:].rstrip() != '"}]':
+        return None
+    uri = text[start:end]
+    if '\\' in uri:
+        return None
+    return uri
+
+
+class FrameDecoder:
+    """websocket帧解码 每帧最多解析一次 没有订阅的uri不解析直接丢弃"""
+
+    def __init__(self, router):
+        self.router = router
+        self.frames_decoded = 0
+        self.frames_dropped = 0
+        # 字符数len(str) 不是字节数 中文等每个字符计1
+        # aiohttp已把文本帧解码为str 统计字节数需要再编码复制整帧 所以不统计
+        self.chars_decoded = 0
+        self.chars_dropped = 0
+
+    def decode(self, text):
+        """返回帧中的事件 {data, eventType, uri}，被丢弃时返回None"""
+        uri = peek_uri(text)
+        if uri is not None and not self.router.has_route(uri):
+            self.frames_dropped += 1
+            self.chars_dropped += len(text)
+            return None
+
+        self.frames_decoded += 1
+        self.chars_decoded += len(text)
+        frame = loads(text)
+        if len(frame) < 3 or not isinstance(frame[2], dict):
+            return None
+        return frame[2]
+
+    def stats(self):
+        return {
+            'frames_decoded': self.frames_decoded,
+            'frames_dropped': self.frames_dropped,
+            'chars_decoded': self.chars_decoded,
+            'chars_dropped': self.chars_dropped,
+        }
@@ -0,0 +1,109 @@
+import asyncio
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+
+JOURNAL_DIR = 'app/resource/journal'
+
+
+class JournalWriter:
+    """
+    把websocket原始帧(可选REST响应)写入gzip压缩的jsonl 每行 {t, kind, ...} t为开始录制后的秒数(单调时钟)
+    调用方只把数据放入队列 压缩和写文件在后台线程 不阻塞run_ws
+    """
+
+    def __init__(self, file, rest=False):
+        self.file = file
+        self.rest = rest
+        self.start = time.monotonic()
+        self.queue = queue.SimpleQueue()
+        self.records = 0
+        os.makedirs(os.path.dirname(file) or '.', exist_ok=True)
+        self.thread = threading.Thread(target=self.__run, name='journal', daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def create(cls, directory=JOURNAL_DIR, rest=False):
+        return cls(os.path.join(directory, time.strftime('lcu-%Y%m%d-%H%M%S.jsonl.gz')), rest)
+
+    def write_frame(self, text):
+        self.queue.put((time.monotonic() - self.start, 'ws', text))
+
+    def write_rest(self, method, path, status, body: bytes):
+        try:
+            body = body.decode('utf-8')
+        except UnicodeDecodeError:
+            # 图标等二进制内容只记录长度
+            body = len(body)
+        self.queue.put((time.monotonic() - self.start, 'rest', (method.upper(), path, status, body)))
+
+    def __run(self):
+        with gzip.open(self.file, 'wt', encoding='utf-8', compresslevel=6) as f:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    return
+                t, kind, data = item
+                if kind == 'ws':
+                    record = {'t': round(t, 6), 'kind': kind, 'frame': data}
+                else:
+                    method, path, status, body = data
+                    record = {'t': round(t, 6), 'kind': kind, 'method': method, 'path': path, 'status': status,
+                              'body': body}
+                f.write(json.dumps(record, ensure_ascii=False))
+                f.write('\n')
+                self.records += 1
+
+    def close(self):
+        """写完队列中剩余的记录后返回"""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+
+def read_journal(file):
+    with gzip.open(file, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class JournalReplayer:
+    """
+    把录制的websocket帧按原来的时间间隔交给 LcuWebsocket 解码和分发
+    speed: 1为原速 N为N倍速 0为不等待尽快回放
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.frames = [(record['t'], record['frame']) for record in read_journal(file) if record['kind'] == 'ws']
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def duration(self):
+        return self.frames[-1][0] - self.frames[0][0] if self.frames else 0
+
+    async def replay(self, websocket, speed=1.0):
+        """返回分发的事件数"""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        first = self.frames[0][0] if self.frames else 0
+        dispatched = 0
+        for i, (t, frame) in enumerate(self.frames):
+            if speed > 0:
+                delay = start + (t - first) / speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif i % 100 == 0:
+                # 让回调任务有机会执行
+                await asyncio.sleep(0)
+            data = websocket.decoder.decode(frame)
+            if data is not None:
+                websocket.match_uri(data)
+                dispatched += 1
+        return dispatched
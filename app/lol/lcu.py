@@ -2,53 +2,97 @@ import asyncio
 import json
 import os
 import random
+import time
+from collections import deque
 
 import aiohttp
-import psutil
-from aiohttp import BasicAuth
 
+from app.common.config import cfg
+from app.common.icon_store import CHAMP_ICON_DIR, add_champ_icon, has_champ_icon, migrate_champ_icons
 from app.common.signals import signal_bus
-from app.common.utils import get_port_token
-
-headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
+from app.common.utils import get_lcu_credentials, write_atomic
+from app.lol.cache import GameDataCache
+from app.lol.catalog import Champion, ChampionCatalog
+from app.lol.champ_select import ChampSelectEngine
+from app.lol.coalescer import EventCoalescer
+from app.lol.connection import LcuConnection, POOL_LIMIT
+from app.lol.decoder import FrameDecoder
+from app.lol.journal import JournalWriter
+from app.lol.metrics import metrics
+from app.lol.policy import DEFAULT, FAST, BACKGROUND, CircuitBreaker, LcuConnectionError, LcuTimeoutError, \
+    LcuUnavailableError, LcuError, LcuStatusError
+from app.lol.router import EventRouter, TaskSet
+
+# 事件合并窗口(毫秒) 未列出的uri每个事件都发出
+# 英雄选择session不经过信号 由websocket任务直接交给ChampSelectEngine
+COALESCE_POLICIES = {
+    '/lol-summoner/v1/current-summoner': 200,
+    '/lol-inventory/v1/wallet/RP': 200,
+    '/lol-inventory/v1/wallet/lol_blue_essence': 200,
+    '/lol-inventory/v1/wallet/lol_orange_essence': 200,
+}
+
+# 图标预下载的并发数 给websocket和接受对局/选择英雄等请求留出连接 不必排在下载之后
+ICON_CONCURRENCY = POOL_LIMIT - 4
+
+# 寻找对局时重新使用预热连接的间隔(秒) 需小于连接池的keepalive和客户端关闭空闲连接的时间
+# 客户端的空闲超时没有公开 aiohttp服务端默认75秒 取一个足够小的值
+KEEP_WARM_INTERVAL = 30
+
+# 点券 蓝色精粹 橙色精粹
+WALLET_CURRENCIES = ('RP', 'lol_blue_essence', 'lol_orange_essence')
 
 
 class LcuWebsocket:
-    def __init__(self, port, token):
-        self.port = port
-        self.token = token
+    def __init__(self, connection: LcuConnection):
+        self.connection = connection
         self.events = []
-        self.subscribes = []
-        self.session = None
+        self.router = EventRouter()
+        self.tasks = TaskSet()
+        self.decoder = FrameDecoder(self.router)
+        # 录制原始帧 为None时不录制
+        self.journal = None
         self.ws = None
         self.task = None
 
     def subscribe(self, event, uri: str = '', event_types: tuple = ('Update', 'Create', 'Delete')):
+        """
+        uri 支持参数 /lol-champ-select/v1/session/actions/{id} 参数以关键字参数传给回调
+        以及前缀 /lol-inventory/v1/wallet/*
+        """
+
         def wrapper(func):
             if event not in self.events:
                 self.events.append(event)
-            self.subscribes.append({
-                'uri': uri,
-                'event_types': event_types,
-                'callable': func
-            })
+            self.router.add(uri, event_types, func)
             return func
 
         return wrapper
 
     def match_uri(self, data):
-        for s in self.subscribes:
-            if s['uri'] == data['uri'] and data['eventType'] in s['event_types']:
-                asyncio.create_task(s['callable'](data))
+        for func, params in self.router.match(data['uri'], data['eventType']):
+            if metrics.enabled:
+                self.tasks.spawn(self.__timed(func, data, params))
+            else:
+                self.tasks.spawn(func(data, **params))
+
+    @staticmethod
+    async def __timed(func, data, params):
+        # 从分发开始计时 包括等待并发限制的时间
+        start = time.perf_counter()
+        try:
+            await func(data, **params)
+        except Exception:
+            metrics.record_handler(func.__name__, time.perf_counter() - start, True)
+            raise
+        metrics.record_handler(func.__name__, time.perf_counter() - start)
 
     async def run_ws(self):
-        self.session = aiohttp.ClientSession(auth=BasicAuth('riot', self.token), headers=headers)
-
         max_retries = 5
         retries = 0
         while retries < max_retries:
             try:
-                self.ws = await self.session.ws_connect(f'wss://127.0.0.1:{self.port}', ssl=False)
+                self.ws = await self.connection.ws_connect()
                 if self.ws:
                     break
             except:
@@ -57,7 +101,6 @@ class LcuWebsocket:
 
         print('ws started')
         if not self.ws:
-            await self.session.close()
             return
 
         for event in self.events:
@@ -65,16 +108,18 @@ class LcuWebsocket:
         while True:
             msg = await self.ws.receive()
             if msg.type == aiohttp.WSMsgType.TEXT and msg.data != '':
-                event = json.loads(msg.data)[1]
-                data = json.loads(msg.data)[2]
-                # print(event, data['eventType'], data['uri'], data['data'])
-                self.match_uri(data)
+                if self.journal:
+                    self.journal.write_frame(msg.data)
+                if metrics.enabled:
+                    metrics.record_frame()
+                data = self.decoder.decode(msg.data)
+                # print(data['eventType'], data['uri'], data['data'])
+                if data is not None:
+                    self.match_uri(data)
             elif msg.type == aiohttp.WSMsgType.CLOSED:
-                print('ws closed')
+                print('ws closed', self.decoder.stats())
                 break
 
-        await self.session.close()
-
     async def start(self):
         if "OnJsonApiEvent" in self.events:
             raise AssertionError(
@@ -85,72 +130,155 @@ class LcuWebsocket:
     async def close(self):
         if self.task and not self.task.done():
             self.task.cancel()
-        if self.session and not self.session.closed:
-            await self.session.close()
+        self.tasks.cancel()
+        if self.ws and not self.ws.closed:
+            await self.ws.close()
 
 
 class Lcu:
     def __init__(self):
         self.listener = None
-        self.session = None
+        self.connection = None
+        self.breaker = CircuitBreaker()
+        self.cache = GameDataCache()
+        self.game_version = None
+        self.icon_task = None
+        self.warm_task = None
+        self.pid = 0
+        self.coalescer = EventCoalescer(COALESCE_POLICIES)
+        self.champ_select = ChampSelectEngine(self)
+        self.accepting = False
+        # 最近的接受对局耗时 (收到推送到请求完成的秒数, 客户端的ready-check计时)
+        self.accept_latencies = deque(maxlen=100)
+        self.journal = None
 
     async def start(self, pid, debug=False):
-        self.debug = debug
         self.pid = pid
-        self.port, self.token = get_port_token(psutil.Process(pid))
-        self.auth = BasicAuth('riot', self.token)
-        self.session = aiohttp.ClientSession(auth=BasicAuth('riot', self.token), headers=headers)
+        port, token = get_lcu_credentials(pid)
+        await self.connect(port, token, debug)
+
+    async def connect(self, port, token, debug=False):
+        """通过端口和token连接客户端"""
+        self.debug = debug
+        self.port, self.token = port, token
+        self.connection = LcuConnection(port, token)
+        self.breaker = CircuitBreaker()
+        self.game_version = None
         print('lcu started')
+        if cfg.enableJournal.value:
+            self.start_journal()
         await self.run_ws_listener()
 
     async def close(self):
         if self.listener:
             await self.listener.close()
             self.listener = None
-        if self.session and not self.session.closed:
-            await self.session.close()
-        self.session = None
+        print('coalescer', self.coalescer.stats())
+        self.coalescer.cancel()
+        if self.icon_task and not self.icon_task.done():
+            self.icon_task.cancel()
+        self.stop_prewarm()
+        if self.connection:
+            await self.connection.close()
+        self.connection = None
+        await self.stop_journal()
+
+    def start_journal(self):
+        """开始录制websocket(以及可选的REST响应)到 app/resource/journal"""
+        if self.journal is None:
+            self.journal = JournalWriter.create(rest=cfg.journalRest.value)
+            print('journal', self.journal.file)
+        if self.listener:
+            self.listener.journal = self.journal
+
+    async def stop_journal(self):
+        journal, self.journal = self.journal, None
+        if self.listener:
+            self.listener.journal = None
+        if journal:
+            await asyncio.to_thread(journal.close)
+            print('journal closed', journal.file, journal.records)
+
+    async def prewarm(self):
+        """
+        寻找对局时预先建立连接 接受对局时无需握手
+        排队可能超过空闲超时 之后每KEEP_WARM_INTERVAL秒重新使用一次 直到stop_prewarm
+        """
+        connection = self.connection
+        if connection is None or (self.warm_task and not self.warm_task.done()):
+            return
+        self.warm_task = asyncio.create_task(self.__keep_warm(connection))
+        await connection.prewarm()
+
+    def stop_prewarm(self):
+        if self.warm_task:
+            self.warm_task.cancel()
+            self.warm_task = None
+
+    @staticmethod
+    async def __keep_warm(connection):
+        while True:
+            await asyncio.sleep(KEEP_WARM_INTERVAL)
+            if connection.closed:
+                return
+            await connection.prewarm()
 
     async def run_ws_listener(self):
-        self.listener = LcuWebsocket(self.port, self.token)
+        self.listener = self.create_ws_listener(self.connection)
+        self.listener.journal = self.journal
+        await self.listener.start()
 
-        @self.listener.subscribe(event='OnJsonApiEvent_lol-gameflow_v1_gameflow-phase',
-                                 uri='/lol-gameflow/v1/gameflow-phase',
-                                 event_types=('Update',))
-        async def on_game_status_changed(event):
-            signal_bus.game_status_changed.emit(event['data'])
+    def create_ws_listener(self, connection):
+        """注册所有订阅 回放录制的事件时也使用"""
+        listener = LcuWebsocket(connection)
 
-        @self.listener.subscribe(event='OnJsonApiEvent_lol-champ-select_v1_session',
-                                 uri='/lol-champ-select/v1/session',
-                                 event_types=('Update',))
+        @listener.subscribe(event='OnJsonApiEvent_lol-gameflow_v1_gameflow-phase',
+                        uri='/lol-gameflow/v1/gameflow-phase',
+                        event_types=('Update',))
+        async def on_game_status_changed(event):
+            self.coalescer.emit(event['uri'], signal_bus.game_status_changed, event['data'])
+
+        @listener.subscribe(event='OnJsonApiEvent_lol-matchmaking_v1_ready-check',
+                        uri='/lol-matchmaking/v1/ready-check',
+                        event_types=('Create', 'Update'))
+        async def on_ready_check_changed(event):
+            # 直接在websocket任务中接受 不经过Qt信号和MainWindow
+            if cfg.enableAutoAccept.value:
+                await self.accept_ready_check(event['data'])
+
+        @listener.subscribe(event='OnJsonApiEvent_lol-champ-select_v1_session',
+                        uri='/lol-champ-select/v1/session',
+                        event_types=('Update',))
         async def on_champ_select_changed(event):
-            signal_bus.champ_select_changed.emit(event['data'])
+            # 与接受对局相同 自动选择/禁用不经过合并窗口和Qt信号
+            await self.champ_select.update(event['data'])
 
-        @self.listener.subscribe(event='OnJsonApiEvent_lol-summoner_v1_current-summoner',
-                                 uri='/lol-summoner/v1/current-summoner',
-                                 event_types=('Update',))
+        @listener.subscribe(event='OnJsonApiEvent_lol-summoner_v1_current-summoner',
+                        uri='/lol-summoner/v1/current-summoner',
+                        event_types=('Update',))
         async def on_summoner_profile_changed(event):
-            signal_bus.summoner_profile_changed.emit(await self.parse_summoner_info(event['data']))
+            self.coalescer.emit(event['uri'], signal_bus.summoner_profile_changed,
+                               await self.parse_summoner_info(event['data']))
 
-        @self.listener.subscribe(event='OnJsonApiEvent_lol-inventory_v1_wallet',
-                                 uri='/lol-inventory/v1/wallet/RP',
-                                 event_types=('Update',))
+        @listener.subscribe(event='OnJsonApiEvent_lol-inventory_v1_wallet',
+                        uri='/lol-inventory/v1/wallet/RP',
+                        event_types=('Update',))
         async def on_summoner_rp_changed(event):
-            signal_bus.summoner_rp_changed.emit(event['data']['RP'])
+            self.coalescer.emit(event['uri'], signal_bus.summoner_rp_changed, event['data']['RP'])
 
-        @self.listener.subscribe(event='OnJsonApiEvent_lol-inventory_v1_wallet',
-                                 uri='/lol-inventory/v1/wallet/lol_blue_essence',
-                                 event_types=('Update',))
+        @listener.subscribe(event='OnJsonApiEvent_lol-inventory_v1_wallet',
+                        uri='/lol-inventory/v1/wallet/lol_blue_essence',
+                        event_types=('Update',))
         async def on_summoner_blue_changed(event):
-            signal_bus.summoner_blue_changed.emit(event['data']['lol_blue_essence'])
+            self.coalescer.emit(event['uri'], signal_bus.summoner_blue_changed, event['data']['lol_blue_essence'])
 
-        @self.listener.subscribe(event='OnJsonApiEvent_lol-inventory_v1_wallet',
-                                 uri='/lol-inventory/v1/wallet/lol_orange_essence',
-                                 event_types=('Update',))
+        @listener.subscribe(event='OnJsonApiEvent_lol-inventory_v1_wallet',
+                        uri='/lol-inventory/v1/wallet/lol_orange_essence',
+                        event_types=('Update',))
         async def on_summoner_orange_changed(event):
-            signal_bus.summoner_orange_changed.emit(event['data']['lol_orange_essence'])
+            self.coalescer.emit(event['uri'], signal_bus.summoner_orange_changed, event['data']['lol_orange_essence'])
 
-        await self.listener.start()
+        return listener
 
     async def get_game_status(self):
         """获取游戏状态"""
@@ -160,12 +288,13 @@ class Lcu:
         icon = f'app/resource/game/profile_icons/{icon_id}.jpg'
 
         if not os.path.exists(icon):
-            if not os.path.exists(os.path.split(icon)[0]):
-                os.makedirs(os.path.split(icon)[0])
             path = f'/lol-game-data/assets/v1/profile-icons/{icon_id}.jpg'
-            resp = await self.request('get', path)
-            with open(icon, "wb") as f:
-                f.write(await resp.read())
+            resp = await self.request('get', path, policy=BACKGROUND)
+            body = await resp.read()
+            # 错误响应不能当作图标写入 否则之后不会再下载
+            if resp.status != 200:
+                raise LcuStatusError(f'GET {path} 返回 {resp.status}', resp.status)
+            await asyncio.to_thread(write_atomic, icon, body)
         return icon
 
     async def parse_summoner_info(self, r):
@@ -189,17 +318,11 @@ class Lcu:
         r = await r.json()
         return await  self.parse_summoner_info(r)
 
-    async def get_summoner_rp(self):
-        res = await self.request('get', '/lol-inventory/v1/wallet/RP')
-        return (await res.json())['RP']  # 点券
-
-    async def get_summoner_blue_essence(self):
-        res = await self.request('get', '/lol-inventory/v1/wallet/lol_blue_essence')
-        return (await res.json())['lol_blue_essence']  # 蓝色精粹
-
-    async def get_summoner_orange_essence(self):
-        res = await self.request('get', '/lol-inventory/v1/wallet/lol_orange_essence')
-        return (await res.json())['lol_orange_essence']  # 橙色精粹
+    async def get_wallet(self, currencies=WALLET_CURRENCIES):
+        """一次请求获取多种货币 {'RP': 100, 'lol_blue_essence': 2000, 'lol_orange_essence': 300}"""
+        res = await self.request('get', '/lol-inventory/v1/wallet',
+                                 params={'currencyTypes': json.dumps(list(currencies))})
+        return await res.json()
 
     async def play_again(self):
         await self.request('post', '/lol-lobby/v2/play-again')
@@ -257,9 +380,31 @@ class Lcu:
         await self.request('post', '/riotclient/kill-and-restart-ux')
 
     async def matchmaking_accept(self):
-        resp = await self.request('post', '/lol-matchmaking/v1/ready-check/accept')
+        resp = await self.request('post', '/lol-matchmaking/v1/ready-check/accept', policy=FAST)
         return resp
 
+    async def get_ready_check(self):
+        res = await self.request('get', '/lol-matchmaking/v1/ready-check', policy=FAST)
+        return await res.json()
+
+    async def accept_ready_check(self, ready_check=None):
+        """对局已找到且还未响应时接受 ready_check为None时先获取一次"""
+        start = time.perf_counter()
+        if ready_check is None:
+            ready_check = await self.get_ready_check()
+        if self.accepting or not ready_check or ready_check.get('state') != 'InProgress' \
+                or ready_check.get('playerResponse') != 'None':
+            return False
+        self.accepting = True
+        try:
+            await self.matchmaking_accept()
+        finally:
+            self.accepting = False
+        latency = time.perf_counter() - start
+        self.accept_latencies.append((latency, ready_check.get('timer', 0)))
+        print(f'ready check accepted: {latency * 1000:.1f}ms (timer {ready_check.get("timer", 0):.1f}s)')
+        return True
+
     async def matchmaking_decline(self):
         await self.request('post', '/lol-matchmaking/v1/ready-check/decline')
 
@@ -275,7 +420,7 @@ class Lcu:
         return await res.json()
 
     async def get_champ_select_session(self):
-        res = await self.request('get', "/lol-champ-select/v1/session")
+        res = await self.request('get', "/lol-champ-select/v1/session", policy=FAST)
         return await res.json()
 
     async def get_curr_select_champ(self):
@@ -291,22 +436,20 @@ class Lcu:
                 return action['id']
 
     async def select_champ(self, action_id, champ_id, completed=False):
-        data = {
-            'championId': champ_id,
-            'type': 'pick',
-            'completed': completed,
-        }
-        res = await self.request('patch', f"/lol-champ-select/v1/session/actions/{action_id}", data=data)
-        return await res.read()
+        """客户端拒绝(如未拥有或不可选)时抛出LcuStatusError"""
+        return await self.__patch_action(action_id, {'championId': champ_id, 'type': 'pick', 'completed': completed})
 
     async def ban_champ(self, action_id, champ_id, completed=False):
-        data = {
-            'championId': champ_id,
-            'type': 'ban',
-            'completed': completed,
-        }
-        res = await self.request('patch', f"/lol-champ-select/v1/session/actions/{action_id}", data=data)
-        return await res.read()
+        """客户端拒绝时抛出LcuStatusError"""
+        return await self.__patch_action(action_id, {'championId': champ_id, 'type': 'ban', 'completed': completed})
+
+    async def __patch_action(self, action_id, data):
+        path = f'/lol-champ-select/v1/session/actions/{action_id}'
+        res = await self.request('patch', path, data=data, policy=FAST)
+        body = await res.read()
+        if res.status >= 400:
+            raise LcuStatusError(f'PATCH {path} 返回 {res.status}: {body[:200]!r}', res.status)
+        return body
 
     async def reroll(self):
         res = await self.request('post', "/lol-champ-select/v1/session/my-selection/reroll")
@@ -318,26 +461,92 @@ class Lcu:
         return await res.json()
 
     async def get_champ_icons(self, champ_id):
-        icon = f'app/resource/game/champ_icons/{champ_id}.png'
-        if not os.path.exists(icon):
-            if not os.path.exists(os.path.split(icon)[0]):
-                os.makedirs(os.path.split(icon)[0])
+        icon = f'{CHAMP_ICON_DIR}/{champ_id}.png'
+        if not has_champ_icon(champ_id):
             path = f"/lol-game-data/assets/v1/champion-icons/{champ_id}.png"
-            resp = await self.request('get', path)
-            with open(icon, "wb") as f:
-                f.write(await resp.read())
+            resp = await self.request('get', path, policy=BACKGROUND)
+            body = await resp.read()
+            # 错误响应不能当作图标保存 否则之后不会再下载
+            if resp.status != 200:
+                raise LcuStatusError(f'GET {path} 返回 {resp.status}', resp.status)
+            add_champ_icon(champ_id, body)
         return icon
 
+    async def fetch_champ_icons(self, champ_ids, concurrency=ICON_CONCURRENCY):
+        """
+        并发下载缺失的英雄图标 每下载完一个发出 champ_icon_loaded
+        失败的也计入进度 最后一定会发出 (total, total)
+        """
+        missing = [champ_id for champ_id in champ_ids if not has_champ_icon(champ_id)]
+        semaphore = asyncio.Semaphore(concurrency)
+        done = 0
+
+        async def fetch(champ_id):
+            nonlocal done
+            try:
+                async with semaphore:
+                    icon = await self.get_champ_icons(champ_id)
+                signal_bus.champ_icon_loaded.emit(champ_id, icon)
+            finally:
+                done += 1
+                signal_bus.champ_icons_progress.emit(done, len(missing))
+
+        results = await asyncio.gather(*(fetch(champ_id) for champ_id in missing), return_exceptions=True)
+        failed = [r for r in results if isinstance(r, Exception)]
+        if failed:
+            print(f'{len(failed)}/{len(missing)} champ icons failed: {failed[0]!r}')
+
+    async def update_champ_icons(self, champ_ids):
+        """先将旧版本留下的png打包 再下载缺失的图标写入打包文件"""
+        await migrate_champ_icons()
+        await self.fetch_champ_icons(champ_ids)
+        await migrate_champ_icons()
+
+    async def get_game_version(self):
+        """客户端游戏版本 用作静态数据缓存的key 两个接口都返回错误时抛出LcuStatusError"""
+        if self.game_version is None:
+            res = await self.request('get', '/system/v1/builds')
+            if res.status == 200:
+                self.game_version = (await res.json())['version']
+            else:
+                path = '/lol-patch/v1/game-version'
+                res = await self.request('get', path)
+                # 错误响应的json不能当作版本号 否则之后的数据都缓存在它下面
+                if res.status != 200:
+                    raise LcuStatusError(f'GET {path} 返回 {res.status}', res.status)
+                self.game_version = await res.json()
+        return self.game_version
+
+    async def get_game_data(self, path):
+        """/lol-game-data 的json 同一游戏版本只从客户端下载一次 客户端返回错误时抛出LcuStatusError"""
+        version = await self.get_game_version()
+        data = await self.cache.get(path, version)
+        if data is not None:
+            return data
+
+        res = await self.request('get', path, policy=BACKGROUND, headers=await self.cache.validators(path))
+        if res.status == 304:
+            data = await self.cache.revalidate(path, version)
+            if data is not None:
+                return data
+            res = await self.request('get', path, policy=BACKGROUND)
+        # 客户端启动中会返回404/500 不能缓存到这个版本下
+        if res.status != 200:
+            raise LcuStatusError(f'GET {path} 返回 {res.status}', res.status)
+        return await self.cache.put(path, version, await res.read(),
+                                    res.headers.get('ETag'), res.headers.get('Last-Modified'))
+
     async def get_champions(self):
-        """获取所有英雄的信息  id 名称 别名 icon 分路"""
-        r = await (await self.request('get', '/lol-game-data/assets/v1/champion-summary.json')).json()
-        return [{'id': item['id'],
-                 'name': item['name'],
-                 'alias': item['alias'],
-                 'icon_path': item['squarePortraitPath'],
-                 'roles': item['roles'],
-                 'icon': await self.get_champ_icons(item['id'])}
-                for item in r]
+        """获取所有英雄 id 名称 别名 icon 分路 返回ChampionCatalog"""
+        r = await self.get_game_data('/lol-game-data/assets/v1/champion-summary.json')
+        # 图标在后台下载 英雄列表立即可用
+        if self.icon_task is None or self.icon_task.done():
+            self.icon_task = asyncio.create_task(self.update_champ_icons([item['id'] for item in r]))
+        champs = [Champion(item['id'], item['name'], item['alias'], item['squarePortraitPath'], item['roles'],
+                           f'{CHAMP_ICON_DIR}/{item["id"]}.png')
+                  for item in r]
+        # 拼音索引较慢 放到线程中建立
+        return await asyncio.to_thread(ChampionCatalog, champs)
 
     async def create_lobby(self, queue_id):
         await self.request('post', '/lol-lobby/v2/lobby', data={'queueId': queue_id})
@@ -350,17 +559,53 @@ class Lcu:
         if resp.status == 200:
             return (await resp.json())['gameConfig']['queueId']
 
-    async def request(self, method, path, max_retries=5, **kwargs):
+    async def request(self, method, path, policy=DEFAULT, **kwargs):
+        """
+        按policy的截止时间和重试次数请求 连接失败时指数退避重试
+        失败抛出 LcuTimeoutError / LcuConnectionError / LcuUnavailableError
+        """
+        start = time.perf_counter()
+        try:
+            resp = await self.__request(method, path, policy, **kwargs)
+        except LcuError:
+            if metrics.enabled:
+                metrics.record_request(method, path, time.perf_counter() - start, True)
+            raise
+        if metrics.enabled:
+            metrics.record_request(method, path, time.perf_counter() - start, resp.status >= 400)
+        if self.journal and self.journal.rest:
+            # 读取后的内容会被缓存 调用方仍可以再读
+            self.journal.write_rest(method, path, resp.status, await resp.read())
+        return resp
+
+    async def __request(self, method, path, policy, **kwargs):
         if kwargs.get('data'):
             kwargs['data'] = json.dumps(kwargs['data'])
+        if self.connection is None or self.connection.closed:
+            raise LcuUnavailableError('客户端未连接')
+        self.breaker.check()
 
-        retries = 0
-        while retries < max_retries:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + policy.deadline
+        attempt = 0
+        while True:
             try:
-                return await self.session.request(method, f'https://127.0.0.1:{self.port}{path}', ssl=False, **kwargs)
-            except:
-                retries += 1
-                await asyncio.sleep(1)
+                timeout = aiohttp.ClientTimeout(total=deadline - loop.time())
+                resp = await self.connection.request(method, path, timeout=timeout, **kwargs)
+                self.breaker.success()
+                return resp
+            except TimeoutError as e:
+                self.breaker.failure()
+                raise LcuTimeoutError(f'{method} {path} 超过 {policy.deadline}s') from e
+            except aiohttp.ClientError as e:
+                self.breaker.failure()
+                attempt += 1
+                delay = policy.backoff(attempt)
+                if attempt > policy.max_retries or loop.time() + delay >= deadline:
+                    raise LcuConnectionError(f'{method} {path} 重试{attempt - 1}次后失败: {e}') from e
+                if metrics.enabled:
+                    metrics.record_retry(method, path)
+                await asyncio.sleep(delay)
 
     async def get(self, path, **kwargs):
         res = await self.request('get', path, **kwargs)
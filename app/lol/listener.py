@@ -1,22 +1,24 @@
 from PyQt6.QtCore import QThread
 
 from app.common.signals import signal_bus
-from app.common.utils import get_lcu_pids, is_lcu_process_exist
+from app.common.utils import discovery, LockfileWatcher
 
 
 class LcuProcessListener(QThread):
-    def __init__(self, parent):
+    def __init__(self, parent, discovery=discovery):
         super().__init__(parent)
         self.running_pid = 0
+        self.exited_pid = 0
         self.daemon = True
+        self.discovery = discovery
 
     def run(self):
         while not self.isInterruptionRequested():
-            pids = get_lcu_pids()
+            pids = self.discovery.get_lcu_pids()
 
             match len(pids):
                 case 0:
-                    if self.running_pid and not is_lcu_process_exist():
+                    if self.running_pid and not self.discovery.is_game_process_exist():
                         self.running_pid = 0
                         signal_bus.lcu_stopped.emit()
                 case 1 | 2:
@@ -37,7 +39,49 @@ class LcuProcessListener(QThread):
                         self.running_pid = pid
                         signal_bus.lcu_changed.emit(pid)
 
-            for _ in range(15):
-                if self.isInterruptionRequested():
-                    return
+            # 客户端运行时等待其退出(退出立即返回) 否则100ms后重新扫描
+            # 客户端已退出但游戏仍在运行时running_pid不清零 不能再等待这个pid 否则会立即返回导致空转
+            if self.running_pid and self.running_pid != self.exited_pid:
+                if self.discovery.wait_exit(self.running_pid, 0.1):
+                    self.exited_pid = self.running_pid
+            else:
                 self.msleep(100)
+
+
+class LcuLockfileListener(QThread):
+    """
+    监听客户端lockfile 文件出现即启动 改写(客户端重启)即切换 删除即关闭
+    客户端崩溃会留下旧的lockfile 其中的进程不存在时视为未运行 继续轮询直到进程出现
+    上报的pid是lockfile中的LeagueClient.exe 而LcuProcessListener上报的是LeagueClientUx.exe
+    两者get_lcu_credentials都能取得端口和token
+    """
+
+    def __init__(self, parent, path, discovery=discovery):
+        super().__init__(parent)
+        self.running_pid = 0
+        self.daemon = True
+        self.discovery = discovery
+        self.watcher = LockfileWatcher(path)
+        self.lockfile = None  # 已上报的lockfile
+
+    def run(self):
+        while not self.isInterruptionRequested():
+            self.watcher.poll()
+            lockfile = self.watcher.lockfile
+            if lockfile is not None and not self.discovery.is_alive(lockfile.pid):
+                lockfile = None
+
+            if lockfile != self.lockfile:
+                if lockfile is None:
+                    self.running_pid = 0
+                    signal_bus.lcu_stopped.emit()
+                elif self.running_pid == 0:
+                    self.running_pid = lockfile.pid
+                    signal_bus.lcu_started.emit(lockfile.pid)
+                else:
+                    # 同一pid下端口或token改变也需要重连
+                    self.running_pid = lockfile.pid
+                    signal_bus.lcu_changed.emit(lockfile.pid)
+                self.lockfile = lockfile
+
+            self.msleep(100)
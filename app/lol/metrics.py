@@ -0,0 +1,171 @@
+import csv
+import json
+import re
+import time
+from collections import deque
+from functools import lru_cache
+
+SUB_BITS = 4
+SUB_BUCKETS = 1 << SUB_BITS
+
+
+class Histogram:
+    """
+    对数分桶的延迟直方图(类似HDR) 单位微秒
+    每个2的幂区间分16个桶 相对误差约6% 记录只需一次整数运算和字典加一
+    """
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @staticmethod
+    def index(value):
+        if value < SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - SUB_BITS - 1
+        return (shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+
+    @staticmethod
+    def lower_bound(index):
+        if index < SUB_BUCKETS:
+            return index
+        shift = index // SUB_BUCKETS - 1
+        return (index % SUB_BUCKETS + SUB_BUCKETS) << shift
+
+    def record(self, us):
+        us = max(int(us), 0)
+        i = self.index(us)
+        self.counts[i] = self.counts.get(i, 0) + 1
+        self.count += 1
+        self.total += us
+        if us > self.max:
+            self.max = us
+
+    def percentile(self, p):
+        if not self.count:
+            return 0
+        rank = p / 100 * self.count
+        seen = 0
+        for i in sorted(self.counts):
+            seen += self.counts[i]
+            if seen >= rank:
+                return min(self.lower_bound(i), self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+
+class EndpointStats:
+    __slots__ = ('count', 'errors', 'retries', 'latency')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.latency = Histogram()
+
+    def to_dict(self):
+        latency = self.latency
+        return {'count': self.count, 'errors': self.errors, 'retries': self.retries,
+                'mean_us': round(latency.mean()), 'p50_us': latency.percentile(50),
+                'p90_us': latency.percentile(90), 'p99_us': latency.percentile(99), 'max_us': latency.max}
+
+
+_ID_SEGMENT = re.compile(r'^(\d+|[0-9a-fA-F-]{32,36})(\.\w+)?$')
+
+
+@lru_cache(maxsize=1024)
+def template(path):
+    """/lol-champ-select/v1/session/actions/3?x=1 -> /lol-champ-select/v1/session/actions/{id}"""
+    path = path.split('?', 1)[0]
+    return '/'.join(_ID_SEGMENT.sub(r'{id}\2', segment) for segment in path.split('/'))
+
+
+class Metrics:
+    """
+    REST请求按 方法+路径模板 统计次数 错误 重试 延迟
+    websocket统计每秒帧数 以及每个回调的耗时
+    enabled为False时调用方直接跳过 不产生开销
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.endpoints = {}
+        self.handlers = {}
+        self.frames = 0
+        # 最近60秒 [秒, 帧数]
+        self.frame_seconds = deque(maxlen=60)
+        self.started = time.time()
+
+    def __endpoint(self, table, key):
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = EndpointStats()
+        return stats
+
+    def record_request(self, method, path, seconds, error=False):
+        stats = self.__endpoint(self.endpoints, f'{method.upper()} {template(path)}')
+        stats.count += 1
+        stats.errors += error
+        stats.latency.record(seconds * 1e6)
+
+    def record_retry(self, method, path):
+        self.__endpoint(self.endpoints, f'{method.upper()} {template(path)}').retries += 1
+
+    def record_frame(self):
+        self.frames += 1
+        second = int(time.monotonic())
+        if self.frame_seconds and self.frame_seconds[-1][0] == second:
+            self.frame_seconds[-1][1] += 1
+        else:
+            self.frame_seconds.append([second, 1])
+
+    def record_handler(self, name, seconds, error=False):
+        stats = self.__endpoint(self.handlers, name)
+        stats.count += 1
+        stats.errors += error
+        stats.latency.record(seconds * 1e6)
+
+    def frames_per_second(self):
+        """(最近一秒, 最近60秒平均, 最近60秒峰值)"""
+        if not self.frame_seconds:
+            return 0, 0, 0
+        now = int(time.monotonic())
+        recent = [count for second, count in self.frame_seconds if now - second < 60]
+        last = self.frame_seconds[-1][1] if now - self.frame_seconds[-1][0] <= 1 else 0
+        return last, sum(recent) / 60, max(recent, default=0)
+
+    def snapshot(self):
+        last, average, peak = self.frames_per_second()
+        return {
+            'started': self.started,
+            'duration': time.time() - self.started,
+            'websocket': {'frames': self.frames, 'fps_last': last, 'fps_avg': round(average, 2), 'fps_peak': peak},
+            'endpoints': {key: stats.to_dict() for key, stats in sorted(self.endpoints.items())},
+            'handlers': {key: stats.to_dict() for key, stats in sorted(self.handlers.items())},
+        }
+
+    def export_json(self, file):
+        with open(file, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+
+    def export_csv(self, file):
+        fields = ['kind', 'name', 'count', 'errors', 'retries', 'mean_us', 'p50_us', 'p90_us', 'p99_us', 'max_us']
+        snapshot = self.snapshot()
+        with open(file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fields)
+            writer.writeheader()
+            for kind in ('endpoints', 'handlers'):
+                for name, row in snapshot[kind].items():
+                    writer.writerow({'kind': kind[:-1], 'name': name, **row})
+
+
+metrics = Metrics()
@@ -0,0 +1,74 @@
+import random
+import time
+
+
+class LcuError(Exception):
+    """客户端请求失败"""
+
+
+class LcuTimeoutError(LcuError):
+    """超过请求截止时间"""
+
+
+class LcuConnectionError(LcuError):
+    """重试后仍无法连接客户端"""
+
+
+class LcuUnavailableError(LcuError):
+    """客户端未连接或正在重启(熔断中)"""
+
+
+class LcuStatusError(LcuError):
+    """客户端返回了错误的状态码(如启动中的404)"""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+class RequestPolicy:
+    """
+    请求策略
+    deadline: 整个请求(含重试和读取响应)的截止时间 秒
+    max_retries: 连接失败时最多重试次数 重试间隔为带抖动的指数退避
+    """
+
+    def __init__(self, deadline, max_retries, base_delay=0.1, max_delay=2.0):
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt):
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1)
+
+
+# 接受对局 选择/禁用英雄 超时立即失败
+FAST = RequestPolicy(deadline=1.5, max_retries=3, base_delay=0.02, max_delay=0.2)
+DEFAULT = RequestPolicy(deadline=5, max_retries=3)
+# 英雄数据 图标等后台请求
+BACKGROUND = RequestPolicy(deadline=30, max_retries=5, base_delay=0.5, max_delay=4)
+
+
+class CircuitBreaker:
+    """连续失败threshold次后熔断cooldown秒 期间请求立即失败 之后放行请求试探"""
+
+    def __init__(self, threshold=5, cooldown=3.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+
+    def check(self):
+        if self.opened_at is not None and time.monotonic() - self.opened_at < self.cooldown:
+            raise LcuUnavailableError('客户端无响应，请求已熔断')
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
@@ -0,0 +1,127 @@
+import asyncio
+import traceback
+
+
+class _Node:
+    __slots__ = ('children', 'param', 'param_name', 'handlers', 'prefix_handlers')
+
+    def __init__(self):
+        self.children = {}  # 固定段 -> _Node
+        self.param = None  # {param} 段
+        self.param_name = None
+        self.handlers = {}  # eventType -> [callable]
+        self.prefix_handlers = {}  # 以 * 结尾的前缀路由
+
+
+class EventRouter:
+    """
+    websocket事件路由
+    固定uri通过字典O(1)查找，带参数 /actions/{id} 或前缀 /wallet/* 的uri通过前缀树查找
+    查找结果按 (uri, eventType) 缓存，重复的uri只查一次前缀树
+    """
+
+    def __init__(self, cache_size=4096):
+        self.exact = {}  # uri -> {eventType: [callable]}
+        self.root = _Node()
+        self.has_patterns = False
+        self.cache = {}
+        self.cache_size = cache_size
+
+    def add(self, uri, event_types, func):
+        self.cache.clear()
+        if '{' not in uri and not uri.endswith('*'):
+            handlers = self.exact.setdefault(uri, {})
+            for event_type in event_types:
+                handlers.setdefault(event_type, []).append(func)
+            return
+
+        self.has_patterns = True
+        node = self.root
+        segments = uri.strip('/').split('/')
+        prefix = segments[-1] == '*'
+        if prefix:
+            segments = segments[:-1]
+        for segment in segments:
+            if segment.startswith('{') and segment.endswith('}'):
+                if node.param is None:
+                    node.param = _Node()
+                    node.param_name = segment[1:-1]
+                elif node.param_name != segment[1:-1]:
+                    raise ValueError(f'参数名冲突: {uri}')
+                node = node.param
+            else:
+                node = node.children.setdefault(segment, _Node())
+
+        handlers = node.prefix_handlers if prefix else node.handlers
+        for event_type in event_types:
+            handlers.setdefault(event_type, []).append(func)
+
+    def match(self, uri, event_type):
+        """返回 [(callable, params)] 调用方不应修改返回值"""
+        key = (uri, event_type)
+        matched = self.cache.get(key)
+        if matched is None:
+            matched = [(func, {}) for func in self.exact.get(uri, {}).get(event_type, ())]
+            if self.has_patterns:
+                self.__match_node(self.root, uri.strip('/').split('/'), 0, event_type, {}, matched)
+            if len(self.cache) >= self.cache_size:
+                self.cache.clear()
+            self.cache[key] = matched
+        return matched
+
+    def has_route(self, uri):
+        """是否有任何订阅可能匹配该uri"""
+        if uri in self.exact:
+            return True
+        if not self.has_patterns:
+            return False
+        return any(self.match(uri, event_type) for event_type in ('Update', 'Create', 'Delete'))
+
+    def __match_node(self, node, segments, i, event_type, params, matched):
+        for func in node.prefix_handlers.get(event_type, ()):
+            if i < len(segments):
+                matched.append((func, dict(params)))
+        if i == len(segments):
+            for func in node.handlers.get(event_type, ()):
+                matched.append((func, dict(params)))
+            return
+
+        child = node.children.get(segments[i])
+        if child is not None:
+            self.__match_node(child, segments, i + 1, event_type, params, matched)
+        if node.param is not None:
+            params[node.param_name] = segments[i]
+            self.__match_node(node.param, segments, i + 1, event_type, params, matched)
+            del params[node.param_name]
+
+
+class TaskSet:
+    """持有task引用，限制同时运行的handler数量，并打印handler抛出的异常"""
+
+    def __init__(self, concurrency=32, max_pending=1024):
+        self.tasks = set()
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.max_pending = max_pending
+
+    def spawn(self, coro):
+        if len(self.tasks) >= self.max_pending:
+            print(f'too many pending handlers, dropped {coro.__qualname__}')
+            coro.close()
+            return None
+        task = asyncio.create_task(self.__run(coro))
+        self.tasks.add(task)
+        task.add_done_callback(self.__on_done)
+        return task
+
+    async def __run(self, coro):
+        async with self.semaphore:
+            return await coro
+
+    def __on_done(self, task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            traceback.print_exception(task.exception())
+
+    def cancel(self):
+        for task in self.tasks:
+            task.cancel()
@@ -1,18 +1,26 @@
 import asyncio
-import random
+import time
 
+from PyQt6.QtCore import pyqtSlot
 from PyQt6.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout
 from qasync import asyncClose, asyncSlot
-from qfluentwidgets import SubtitleLabel, BodyLabel, CardWidget, StrongBodyLabel, IndeterminateProgressRing
+from qfluentwidgets import SubtitleLabel, BodyLabel, CardWidget, StrongBodyLabel, IndeterminateProgressRing, \
+    CaptionLabel
 
 from app.common.config import cfg
 from app.common.signals import signal_bus
+from app.common.snapshot import snapshot
 from app.components.splash import SplashScreen
+from app.lol.catalog import Champion, ChampionCatalog
 from app.lol.lcu import lcu
-from app.lol.listener import LcuProcessListener
+from app.lol.listener import LcuProcessListener, LcuLockfileListener
+from app.lol.metrics import metrics
 from app.view.setting_interface import SettingInterface
 from app.view.summoner_interface import SummonerInterface
 
+# 连接后获取初始状态的总截止时间(秒) 超时的部分等待websocket推送
+HYDRATE_DEADLINE = 10
+
 
 class MainWindow(QWidget):
     def __init__(self):
@@ -20,6 +28,7 @@ class MainWindow(QWidget):
         # splash
         self.splash_screen = SplashScreen(self)
         self.splash_screen.setFixedSize(800, 600)
+        self.splash_screen.show_progress()
 
         self.main_box = QVBoxLayout(self)
 
@@ -29,6 +38,7 @@ class MainWindow(QWidget):
         self.game_status_box = QHBoxLayout(self.game_status_widget)
         self.label = SubtitleLabel(text='游戏状态')
         self.label2 = StrongBodyLabel(text='None')
+        self.stale_label = CaptionLabel(text='上次的数据 等待客户端')
 
         self.summoner_card_widget = SummonerInterface()
 
@@ -37,28 +47,44 @@ class MainWindow(QWidget):
         self.pid_label = BodyLabel(text='pid = ')
         self.port_label = BodyLabel(text='port = ')
         self.token_label = BodyLabel(text='token = ')
+        self.icon_progress_label = CaptionLabel()
 
         self.setting_widget = SettingInterface()
 
+        # 检测到客户端 -> 初始状态全部显示 的耗时(秒)
+        self.time_to_interactive = None
+        # 已开始获取实时数据 快照不再覆盖界面
+        self.live = False
+
         self.__init_widget()
         self.__init_layout()
         self.__connect_signal_to_slot()
 
-        self.lcu_process_listener = LcuProcessListener(self)
+        if cfg.lockfilePath.value:
+            self.lcu_process_listener = LcuLockfileListener(self, cfg.lockfilePath.value)
+        else:
+            self.lcu_process_listener = LcuProcessListener(self)
         self.lcu_process_listener.start()
 
     def __init_widget(self):
-        pass
+        # 连接客户端之前被启动画面遮挡 连接后再显示(此时才创建设置卡片)
+        self.setting_widget.setVisible(False)
+        self.stale_label.setVisible(False)
+        self.icon_progress_label.setVisible(False)
+        metrics.enabled = cfg.enableMetrics.value
 
     def __init_layout(self):
         self.lcu_box.addStretch(1)
         self.lcu_box.addWidget(self.pid_label)
         self.lcu_box.addWidget(self.port_label)
         self.lcu_box.addWidget(self.token_label)
+        self.lcu_box.addWidget(self.icon_progress_label)
         self.lcu_box.addStretch(1)
 
         self.game_status_box.addWidget(self.label)
         self.game_status_box.addWidget(self.label2)
+        self.game_status_box.addStretch(1)
+        self.game_status_box.addWidget(self.stale_label)
 
         self.main_box.addWidget(self.game_status_widget)
         self.main_box.addWidget(self.summoner_card_widget)
@@ -78,7 +104,7 @@ class MainWindow(QWidget):
         signal_bus.lcu_changed.connect(self.__on_lcu_changed)
 
         signal_bus.game_status_changed.connect(self.__on_game_status_changed)
-        signal_bus.champ_select_changed.connect(self.__on_champ_select_changed)
+        signal_bus.champ_icons_progress.connect(self.__on_champ_icons_progress)
 
         signal_bus.summoner_profile_changed.connect(self.__on_summoner_profile_changed)
         signal_bus.summoner_rp_changed.connect(self.__on_summoner_rp_changed)
@@ -88,6 +114,11 @@ class MainWindow(QWidget):
     @asyncSlot(str)
     async def __on_game_status_changed(self, status: str):
         self.label2.setText(status)
+        if status != 'ChampSelect':
+            lcu.champ_select.reset()
+        # 拒绝或有人未接受时会回到Matchmaking 接受对局前都保持连接
+        if status not in ('Matchmaking', 'ReadyCheck'):
+            lcu.stop_prewarm()
         match status:
             case 'None':
                 print('大厅')
@@ -96,9 +127,11 @@ class MainWindow(QWidget):
                     await lcu.matchmaking_search()
             case 'Matchmaking':
                 print('寻找对局')
+                await lcu.prewarm()
             case 'ReadyCheck':
+                # 一般已由ready-check推送接受 这里只在未响应时补上
                 if cfg.enableAutoAccept.value:
-                    await lcu.matchmaking_accept()
+                    await lcu.accept_ready_check()
             case 'ChampSelect':
                 await self.__on_champ_select_begin()  # 第一次进入英雄选择阶段
             case 'GameStart':
@@ -115,56 +148,48 @@ class MainWindow(QWidget):
                 if cfg.enableAutoReconnect.value:
                     await lcu.reconnect()
 
-    @asyncSlot(dict)
-    async def __on_champ_select_changed(self, data):
-        pass
-
-        # selected_champ_id = await lcu.get_curr_select_champ()
-        # if selected_champ_id > 0:
-        #     return
-        # actions = data['actions'][0]
-
-        # action = [action for action in actions if action['actorCellId'] == data['localPlayerCellId']][0]
-        # action_id = action['id']
-        #
-        # action_type = action['type']
-        #
-        # action_champ_id = action['championId']
-        #
-        # a = data['bans']['myTeamBans']
-        # b = data['bans']['theirTeamBans']
-        # bans = []
-        # [bans.append(i) for i in a + b if i not in bans]
-        #
-        # match action_type:
-        #     case 'pick':
-        #         if action_champ_id > 0:
-        #             return
-        #         want_select_champs = cfg.autoSelectChamp.value
-        #         if len(want_select_champs) == 0:
-        #             return
-        #         for champ_id in want_select_champs:
-        #             if champ_id not in bans:
-        #                 await lcu.select_champ(action_id, champ_id, cfg.enableAutoSelect.value)
-        #                 break
+    @pyqtSlot(int, int)
+    def __on_champ_icons_progress(self, done, total):
+        """下载缺失的英雄图标时显示进度 下载完隐藏"""
+        self.icon_progress_label.setText(f'下载英雄图标 {done}/{total}')
+        self.icon_progress_label.setVisible(done < total)
 
     async def __on_champ_select_begin(self):
-        """只做匹配pick"""
-        champ_select_session = await lcu.get_champ_select_session()
-        actions = champ_select_session['actions'][0]
-        local_id = champ_select_session['localPlayerCellId']
-
-        action = [action for action in actions if action['actorCellId'] == local_id][0]
-        if action['type'] == 'pick':
-            want_select_champs = cfg.wantSelectChamps.value
-            if len(want_select_champs) == 0:
-                return
-            champ_id = random.choice(want_select_champs)
-            await lcu.select_champ(action['id'], champ_id, cfg.enableAutoSelect.value)
+        """
+        进入英雄选择阶段时主动获取一次session 避免漏掉阶段变化前的推送
+        session推送可能已经先处理过 不能重置 引擎对已处理的action不会重复发送
+        """
+        await lcu.champ_select.update(await lcu.get_champ_select_session())
+
+    async def load_snapshot(self):
+        """
+        用上次保存的数据立即显示界面并标记为过期 连接客户端获取到实时数据后去掉标记
+        需在事件循环运行后调用(main.py) 读取文件用到asyncio.to_thread
+        """
+        if not await snapshot.load() or self.live or snapshot.get('summoner') is None:
+            return
+        self.summoner_card_widget.update_info(snapshot.get('summoner'))
+        self.__show_wallet(snapshot.get('wallet', {}))
+        self.stale_label.setVisible(True)
+        self.setting_widget.setVisible(True)
+        self.splash_screen.hide()
+
+        rows = snapshot.get('champions')
+        if rows:
+            champs = await asyncio.to_thread(ChampionCatalog, [Champion(*row) for row in rows])
+            # 客户端的英雄列表已经先到了
+            if self.setting_widget.champs is None:
+                await self.setting_widget.init_champs(champs)
+
+    def __show_wallet(self, wallet):
+        self.summoner_card_widget.update_rp(wallet.get('RP', ''))
+        self.summoner_card_widget.update_blue_essence(wallet.get('lol_blue_essence', ''))
+        self.summoner_card_widget.update_orange_essence(wallet.get('lol_orange_essence', ''))
 
     @asyncSlot(dict)
     async def __on_summoner_profile_changed(self, info):
         self.summoner_card_widget.update_info(info)
+        snapshot.update('summoner', info)
 
         self.pid_label.setText(f'pid = {lcu.pid}')
         self.port_label.setText(f'port = {lcu.port}')
@@ -173,29 +198,76 @@ class MainWindow(QWidget):
     @asyncSlot(int)
     async def __on_summoner_rp_changed(self, data):
         self.summoner_card_widget.update_rp(data)
+        snapshot.update('wallet', {'RP': data})
 
     @asyncSlot(int)
     async def __on_summoner_blue_changed(self, data):
         self.summoner_card_widget.update_blue_essence(data)
+        snapshot.update('wallet', {'lol_blue_essence': data})
 
     @asyncSlot(int)
     async def __on_summoner_orange_changed(self, data):
         self.summoner_card_widget.update_orange_essence(data)
+        snapshot.update('wallet', {'lol_orange_essence': data})
+
+    async def __hydrate(self):
+        """
+        并发获取初始状态 每一部分返回后立即显示 整体超过HYDRATE_DEADLINE的部分取消
+        返回每一部分的耗时(秒) 失败或超时为None
+        """
+
+        async def game_status():
+            await self.__on_game_status_changed(await lcu.get_game_status())
+
+        async def summoner():
+            await self.__on_summoner_profile_changed(await lcu.get_curr_summoner())
+
+        async def wallet():
+            wallet = await lcu.get_wallet()
+            self.__show_wallet(wallet)
+            snapshot.update('wallet', wallet)
+
+        start = time.perf_counter()
+        elapsed = {}
+
+        async def timed(name, coro):
+            await coro
+            elapsed[name] = time.perf_counter() - start
+
+        tasks = {asyncio.create_task(timed(name, coro)): name
+                 for name, coro in (('status', game_status()), ('summoner', summoner()), ('wallet', wallet()))}
+        done, pending = await asyncio.wait(tasks, timeout=HYDRATE_DEADLINE)
+        for task in pending:
+            print(f'{tasks[task]} 超过 {HYDRATE_DEADLINE}s')
+            task.cancel()
+        for task in done:
+            if task.exception():
+                print(f'{tasks[task]} 获取失败: {task.exception()!r}')
+        return {name: elapsed.get(name) for name in tasks.values()}
 
     @asyncSlot(int)
     async def __on_lcu_started(self, pid):
+        start = time.perf_counter()
+        self.live = True
         await lcu.start(pid, True)
-        await self.__on_game_status_changed(await lcu.get_game_status())
-        await self.__on_summoner_profile_changed(await lcu.get_curr_summoner())
-        await self.__on_summoner_rp_changed(await lcu.get_summoner_rp())
-        await self.__on_summoner_blue_changed(await lcu.get_summoner_blue_essence())
-        await self.__on_summoner_orange_changed(await lcu.get_summoner_orange_essence())
-        asyncio.create_task(self.setting_widget.auto_select_card.init_champs())
+        self.setting_widget.set_live(True)
+        # 英雄列表只有设置卡片用到 不计入可交互时间
+        asyncio.create_task(self.setting_widget.init_champs())
 
+        self.setting_widget.setVisible(True)
         self.splash_screen.hide()
+        elapsed = await self.__hydrate()
+        if None not in elapsed.values():
+            self.stale_label.setVisible(False)
+
+        self.time_to_interactive = time.perf_counter() - start
+        print(f'time to interactive {self.time_to_interactive * 1000:.0f}ms',
+              {name: None if t is None else round(t * 1000) for name, t in elapsed.items()})
 
     @asyncSlot()
     async def __on_lcu_stopped(self):
+        self.live = False
+        self.setting_widget.set_live(False)
         self.splash_screen.show()
         try:
             await lcu.close()
@@ -212,6 +284,8 @@ class MainWindow(QWidget):
     async def closeEvent(self, event):
         self.lcu_process_listener.requestInterruption()
         await self.__on_lcu_stopped()
+        await snapshot.flush()
+        await asyncio.to_thread(cfg.flush)
         if self.lcu_process_listener.isRunning():
             await asyncio.to_thread(self.lcu_process_listener.wait)
         return super().closeEvent(event)
@@ -1,14 +1,21 @@
-from PyQt6.QtCore import Qt, pyqtSlot, pyqtSignal, QSize, QEvent
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QHBoxLayout, QSpacerItem, QSizePolicy, QFrame
+import asyncio
+import time
+
+from PyQt6.QtCore import Qt, pyqtSlot, pyqtSignal, QSize, QEvent, QTimer
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QHBoxLayout, QSpacerItem, QSizePolicy, QFrame, \
+    QFileDialog, QTableWidgetItem
 from qasync import asyncSlot
 from qfluentwidgets import SettingCardGroup, SmoothScrollArea, SwitchSettingCard, ExpandGroupSettingCard, FluentIcon, \
-    PushButton, SwitchButton, IndicatorPosition, PushSettingCard, LineEdit, TransparentToolButton
+    PushButton, SwitchButton, IndicatorPosition, PushSettingCard, TransparentToolButton, TableWidget
 
 from app.common.config import cfg
 from app.common.signals import signal_bus
+from app.common.snapshot import snapshot
 from app.components.message_box import ChampSelectMessageBox
 from app.components.round_widget import RoundIcon
+from app.lol.catalog import ChampionCatalog
 from app.lol.lcu import lcu
+from app.lol.metrics import metrics
 
 
 class SettingInterface(SmoothScrollArea):
@@ -18,6 +25,24 @@ class SettingInterface(SmoothScrollArea):
 
         self.setting_widget = QWidget()
         self.setting_box = QVBoxLayout(self.setting_widget)
+        self.champs = None
+        self.built = False
+        # 只显示快照(未连接客户端)时操作客户端的按钮不可用 开关和英雄选择仍可修改
+        self.live = False
+
+        self.setWidget(self.setting_widget)
+        self.setWidgetResizable(True)
+        self.enableTransparentBackground()
+
+    def showEvent(self, e):
+        # 卡片在第一次显示时才创建 不占用启动时间
+        self.build()
+        super().showEvent(e)
+
+    def build(self):
+        if self.built:
+            return
+        self.built = True
 
         self.champ_select_group = SettingCardGroup('英雄选择')
         self.auto_accept_card = AutoAcceptCard()
@@ -35,10 +60,15 @@ class SettingInterface(SmoothScrollArea):
 
         self.restart_client_card = RestartClientCard()
 
+        self.diagnostics_group = SettingCardGroup('诊断')
+        self.diagnostics_card = DiagnosticsCard()
+
         """add layout"""
 
         self.client_group.addSettingCard(self.restart_client_card)
 
+        self.diagnostics_group.addSettingCard(self.diagnostics_card)
+
         self.game_group.addSettingCard(self.back_hall_card)
         self.game_group.addSettingCard(self.auto_search_card)
         self.game_group.addSettingCard(self.auto_reconnect_card)
@@ -53,11 +83,35 @@ class SettingInterface(SmoothScrollArea):
         self.setting_box.addWidget(self.champ_select_group)
         self.setting_box.addWidget(self.game_group)
         self.setting_box.addWidget(self.client_group)
+        self.setting_box.addWidget(self.diagnostics_group)
         self.setting_box.addStretch(1)
 
-        self.setWidget(self.setting_widget)
-        self.setWidgetResizable(True)
-        self.enableTransparentBackground()
+        self.set_live(self.live)
+        if self.champs is not None:
+            asyncio.ensure_future(self.__init_card_champs())
+
+    def set_live(self, live):
+        self.live = live
+        if not self.built:
+            return
+        for card in (self.back_hall_card, self.practice_card, self.play_again_card, self.restart_client_card):
+            card.setEnabled(live)
+
+    async def init_champs(self, champs: ChampionCatalog = None):
+        """
+        两张卡片共用一份英雄列表 卡片还未创建时先保存
+        champs为快照中的英雄列表 为None时从客户端获取并更新快照
+        """
+        if champs is None:
+            champs = await lcu.get_champions()
+            snapshot.update('champions', [champ.to_row() for champ in champs])
+        self.champs = champs
+        if self.built:
+            await self.__init_card_champs()
+
+    async def __init_card_champs(self):
+        await self.auto_select_card.init_champs(self.champs)
+        await self.auto_ban_card.init_champs(self.champs)
 
 
 class AutoAcceptCard(SwitchSettingCard):
@@ -75,7 +129,9 @@ class AutoAcceptCard(SwitchSettingCard):
     async def __on_checked_changed(self, is_checked: bool):
         if is_checked:
             self.switchButton.setOnText('开')
-            signal_bus.game_status_changed.emit(await lcu.get_game_status())
+            # 未连接时只修改配置 连接后按当前状态处理
+            if lcu.connection:
+                signal_bus.game_status_changed.emit(await lcu.get_game_status())
         else:
             self.switchButton.setOffText('关')
 
@@ -87,6 +143,7 @@ class AutoSelectCard(ExpandGroupSettingCard):
             title="自动选择英雄",
             content="随机亮起所选英雄，开启锁定则自动pick"
         )
+        self.champs = ChampionCatalog()
 
         self.status_label = QLabel(text='已启用' if cfg.enableAutoSelect.value else '未启用')
         self.select_widget = QWidget()
@@ -111,7 +168,9 @@ class AutoSelectCard(ExpandGroupSettingCard):
         self.lock_switch.setEnabled(False if is_not_want_select else True)
 
         self.select_btn.clicked.connect(self.on_select_btn_clicked)
+        self.champ_line_edit.clearRequested.connect(lambda: self.on_champ_selected_changed([]))
         self.lock_switch.checkedChanged.connect(self.__on_checked_changed)
+        signal_bus.champ_icon_loaded.connect(self.__on_champ_icon_loaded)
 
     def __init_layout(self):
         self.lock_layout.addWidget(self.lock_label)
@@ -130,15 +189,18 @@ class AutoSelectCard(ExpandGroupSettingCard):
         # self.status_label.setText('已启用' if is_checked else '未启用')
         cfg.set(cfg.enableAutoSelect, is_checked)
 
-    async def init_champs(self, champs: dict = None):
+    @pyqtSlot(int, str)
+    def __on_champ_icon_loaded(self, champ_id, icon):
+        if champ_id in self.champs and champ_id in cfg.wantSelectChamps.value:
+            self.on_champ_selected_changed(cfg.wantSelectChamps.value)
+
+    async def init_champs(self, champs: ChampionCatalog = None):
         if champs:
             self.champs = champs
         else:
             self.champs = await lcu.get_champions()
-        self.champ_line_edit.clearRequested.connect(lambda: self.on_champ_selected_changed([]))
         selected = cfg.wantSelectChamps.value
-        icons = [[champ for champ in self.champs if champ['id'] == id][0]['icon'] for id in selected]
-        self.champ_line_edit.updateChampions(icons)
+        self.champ_line_edit.updateChampions(self.champs.icons(selected))
 
     @asyncSlot()
     async def on_select_btn_clicked(self):
@@ -150,8 +212,7 @@ class AutoSelectCard(ExpandGroupSettingCard):
     @pyqtSlot(list)
     def on_champ_selected_changed(self, selected):
         cfg.set(cfg.wantSelectChamps, selected)
-        icons = [[champ for champ in self.champs if champ['id'] == id][0]['icon'] for id in selected]
-        self.champ_line_edit.updateChampions(icons)
+        self.champ_line_edit.updateChampions(self.champs.icons(selected))
         self.lock_switch.setEnabled(False if len(selected) == 0 else True)
         self.status_label.setText('未启用' if len(selected) == 0 else '已启用')
 
@@ -161,29 +222,49 @@ class AutoBanCard(ExpandGroupSettingCard):
         super().__init__(
             icon=FluentIcon.TRANSPARENT,
             title="自动禁用英雄",
-            content="随机亮起所选英雄，开启锁定则自动ban",
+            content="按顺序亮起第一个可禁用的英雄，开启锁定则自动ban",
 
         )
-        self.setEnabled(False)
-
-        self.status_label = QLabel()
-        self.status_label.setText('未启用')
+        self.champs = ChampionCatalog()
 
+        self.status_label = QLabel(text='已启用' if cfg.wantBanChamps.value else '未启用')
         self.select_widget = QWidget()
         self.select_layout = QHBoxLayout(self.select_widget)
         self.title_label = QLabel(text='默认禁用英雄：')
-        self.champ_line_edit = LineEdit()
-        self.champ_line_edit.setClearButtonEnabled(True)
-        self.champ_line_edit.setMinimumWidth(250)
+        self.champ_line_edit = ChampionsCard()
         self.select_btn = PushButton(text='选择')
 
         self.lock_widget = QWidget()
         self.lock_layout = QHBoxLayout(self.lock_widget)
-        self.lock_label = QLabel(text='自动禁用英雄')
+        self.lock_label = QLabel(text='自动锁定禁用')
         self.lock_switch = SwitchButton(indicatorPos=IndicatorPosition.RIGHT)
 
+        self.hover_widget = QWidget()
+        self.hover_layout = QHBoxLayout(self.hover_widget)
+        self.hover_label = QLabel(text='先亮起再锁定')
+        self.hover_switch = SwitchButton(indicatorPos=IndicatorPosition.RIGHT)
+        self.__init_widget()
+        self.__init_layout()
+
+    def __init_widget(self):
+        init_switch_button_text(self.lock_switch)
+        init_switch_button_text(self.hover_switch)
+
+        self.lock_switch.setChecked(cfg.enableAutoBan.value)
+        self.hover_switch.setChecked(cfg.banHoverFirst.value)
+        self.__update_enabled(cfg.wantBanChamps.value)
+
+        self.select_btn.clicked.connect(self.on_select_btn_clicked)
+        self.champ_line_edit.clearRequested.connect(lambda: self.on_champ_selected_changed([]))
+        self.lock_switch.checkedChanged.connect(self.__on_lock_checked_changed)
+        self.hover_switch.checkedChanged.connect(lambda checked: cfg.set(cfg.banHoverFirst, checked))
+        signal_bus.champ_icon_loaded.connect(self.__on_champ_icon_loaded)
+
+    def __init_layout(self):
         self.lock_layout.addWidget(self.lock_label)
         self.lock_layout.addWidget(self.lock_switch)
+        self.hover_layout.addWidget(self.hover_label)
+        self.hover_layout.addWidget(self.hover_switch)
 
         self.select_layout.addWidget(self.title_label, Qt.AlignmentFlag.AlignLeft)
         self.select_layout.addWidget(self.champ_line_edit, 0, Qt.AlignmentFlag.AlignRight)
@@ -192,6 +273,38 @@ class AutoBanCard(ExpandGroupSettingCard):
         self.addWidget(self.status_label)
         self.addGroupWidget(self.select_widget)
         self.addGroupWidget(self.lock_widget)
+        self.addGroupWidget(self.hover_widget)
+
+    def __update_enabled(self, selected):
+        self.status_label.setText('已启用' if selected else '未启用')
+        self.lock_switch.setEnabled(bool(selected))
+        self.hover_switch.setEnabled(bool(selected) and self.lock_switch.isChecked())
+
+    @pyqtSlot(bool)
+    def __on_lock_checked_changed(self, is_checked: bool):
+        cfg.set(cfg.enableAutoBan, is_checked)
+        self.__update_enabled(cfg.wantBanChamps.value)
+
+    @pyqtSlot(int, str)
+    def __on_champ_icon_loaded(self, champ_id, icon):
+        if champ_id in self.champs and champ_id in cfg.wantBanChamps.value:
+            self.champ_line_edit.updateChampions(self.champs.icons(cfg.wantBanChamps.value))
+
+    async def init_champs(self, champs: ChampionCatalog):
+        self.champs = champs
+        self.champ_line_edit.updateChampions(self.champs.icons(cfg.wantBanChamps.value))
+
+    @asyncSlot()
+    async def on_select_btn_clicked(self):
+        box = ChampSelectMessageBox(self.champs, cfg.wantBanChamps.value, self.window())
+        box.completed.connect(self.on_champ_selected_changed)
+        box.exec()
+
+    @pyqtSlot(list)
+    def on_champ_selected_changed(self, selected):
+        cfg.set(cfg.wantBanChamps, selected)
+        self.champ_line_edit.updateChampions(self.champs.icons(selected))
+        self.__update_enabled(selected)
 
 
 class BackHallCard(PushSettingCard):
@@ -222,11 +335,13 @@ class AutoSearchCard(SwitchSettingCard):
     async def __checked_changed(self, is_checked: bool):
         if is_checked:
             self.switchButton.setOnText('开')
-            signal_bus.game_status_changed.emit(await lcu.get_game_status())
+            if lcu.connection:
+                signal_bus.game_status_changed.emit(await lcu.get_game_status())
         else:
 
             self.switchButton.setOffText('关')
-            await lcu.matchmaking_search_cancel()
+            if lcu.connection:
+                await lcu.matchmaking_search_cancel()
 
 
 class AutoReconnectCard(SwitchSettingCard):
@@ -244,7 +359,8 @@ class AutoReconnectCard(SwitchSettingCard):
     async def __checked_changed(self, is_checked: bool):
         if is_checked:
             self.switchButton.setOnText('开')
-            signal_bus.game_status_changed.emit(await lcu.get_game_status())
+            if lcu.connection:
+                signal_bus.game_status_changed.emit(await lcu.get_game_status())
         else:
             self.switchButton.setOffText('关')
 
@@ -297,6 +413,133 @@ class RestartClientCard(PushSettingCard):
         await lcu.restart_client()
 
 
+class DiagnosticsCard(ExpandGroupSettingCard):
+    COLUMNS = ['名称', '次数', '错误', '重试', 'p50(ms)', 'p90(ms)', 'p99(ms)', '最大(ms)']
+
+    def __init__(self):
+        super().__init__(
+            icon=FluentIcon.TRANSPARENT,
+            title="请求统计",
+            content="每个接口的请求次数和延迟，websocket每秒帧数和回调耗时"
+        )
+        self.status_label = QLabel()
+        self.switch = SwitchButton(indicatorPos=IndicatorPosition.RIGHT)
+
+        self.table = TableWidget()
+        self.table.setColumnCount(len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(TableWidget.EditTrigger.NoEditTriggers)
+        self.table.setFixedHeight(260)
+
+        self.btn_widget = QWidget()
+        self.btn_layout = QHBoxLayout(self.btn_widget)
+        self.reset_btn = PushButton(text='清空')
+        self.json_btn = PushButton(text='导出JSON')
+        self.csv_btn = PushButton(text='导出CSV')
+
+        self.journal_widget = QWidget()
+        self.journal_layout = QHBoxLayout(self.journal_widget)
+        self.journal_label = QLabel(text='录制websocket事件')
+        self.journal_switch = SwitchButton(indicatorPos=IndicatorPosition.RIGHT)
+        self.rest_label = QLabel(text='同时录制REST响应')
+        self.rest_switch = SwitchButton(indicatorPos=IndicatorPosition.RIGHT)
+
+        self.timer = QTimer(self)
+        self.__init_widget()
+        self.__init_layout()
+
+    def __init_widget(self):
+        init_switch_button_text(self.switch)
+        init_switch_button_text(self.journal_switch)
+        init_switch_button_text(self.rest_switch)
+        self.switch.setChecked(cfg.enableMetrics.value)
+        self.journal_switch.setChecked(cfg.enableJournal.value)
+        self.rest_switch.setChecked(cfg.journalRest.value)
+        metrics.enabled = cfg.enableMetrics.value
+
+        self.journal_switch.checkedChanged.connect(self.__on_journal_checked_changed)
+        self.rest_switch.checkedChanged.connect(self.__on_rest_checked_changed)
+
+        self.switch.checkedChanged.connect(self.__on_checked_changed)
+        self.reset_btn.clicked.connect(self.__on_reset_clicked)
+        self.json_btn.clicked.connect(lambda: self.__export('JSON (*.json)', metrics.export_json))
+        self.csv_btn.clicked.connect(lambda: self.__export('CSV (*.csv)', metrics.export_csv))
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def __init_layout(self):
+        self.btn_layout.addWidget(self.switch)
+        self.btn_layout.addStretch(1)
+        self.btn_layout.addWidget(self.reset_btn)
+        self.btn_layout.addWidget(self.json_btn)
+        self.btn_layout.addWidget(self.csv_btn)
+
+        self.journal_layout.addWidget(self.journal_label)
+        self.journal_layout.addWidget(self.journal_switch)
+        self.journal_layout.addStretch(1)
+        self.journal_layout.addWidget(self.rest_label)
+        self.journal_layout.addWidget(self.rest_switch)
+
+        self.addWidget(self.status_label)
+        self.addGroupWidget(self.btn_widget)
+        self.addGroupWidget(self.table)
+        self.addGroupWidget(self.journal_widget)
+
+    @pyqtSlot(bool)
+    def __on_checked_changed(self, is_checked: bool):
+        cfg.set(cfg.enableMetrics, is_checked)
+        metrics.enabled = is_checked
+        self.refresh()
+
+    @asyncSlot(bool)
+    async def __on_journal_checked_changed(self, is_checked: bool):
+        # 新的录制从下一次连接开始时也会按配置自动开启
+        cfg.set(cfg.enableJournal, is_checked)
+        if not is_checked:
+            await lcu.stop_journal()
+        elif lcu.connection:
+            lcu.start_journal()
+
+    @pyqtSlot(bool)
+    def __on_rest_checked_changed(self, is_checked: bool):
+        cfg.set(cfg.journalRest, is_checked)
+        if lcu.journal:
+            lcu.journal.rest = is_checked
+
+    @pyqtSlot()
+    def __on_reset_clicked(self):
+        metrics.reset()
+        self.refresh()
+
+    def __export(self, file_filter, export):
+        file, _ = QFileDialog.getSaveFileName(self, '导出', f'metrics_{int(time.time())}', file_filter)
+        if file:
+            export(file)
+
+    def refresh(self):
+        if not metrics.enabled:
+            self.status_label.setText('未启用')
+            return
+        last, average, peak = metrics.frames_per_second()
+        self.status_label.setText(f'ws {last}帧/s 平均{average:.1f} 峰值{peak}')
+        # 折叠时只更新状态
+        if not self.isExpand:
+            return
+
+        snapshot = metrics.snapshot()
+        rows = [(f'[ws] {name}', row) for name, row in snapshot['handlers'].items()]
+        rows += list(snapshot['endpoints'].items())
+        self.table.setRowCount(len(rows))
+        for i, (name, row) in enumerate(rows):
+            values = [name, row['count'], row['errors'], row['retries'],
+                      *(f'{row[key] / 1000:.2f}' for key in ('p50_us', 'p90_us', 'p99_us', 'max_us'))]
+            for j, value in enumerate(values):
+                self.table.setItem(i, j, QTableWidgetItem(str(value)))
+        self.table.resizeColumnsToContents()
+
+
 class ChampionsCard(QFrame):
     clearRequested = pyqtSignal()
 
@@ -1,4 +1,3 @@
-import pyperclip
 from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import QHBoxLayout, QVBoxLayout
 from qfluentwidgets import ElevatedCardWidget, SubtitleLabel, BodyLabel, ToolButton, FluentIcon
@@ -51,7 +50,12 @@ class SummonerInterface(ElevatedCardWidget):
         self.summoner_box.addLayout(self.name_wallet_box)
         self.summoner_box.addStretch(1)
 
-        self.name_copy_btn.clicked.connect(lambda: pyperclip.copy(f'{self.name_label.text()}{self.tag_label.text()}'))
+        self.name_copy_btn.clicked.connect(self.__copy_name)
+
+    def __copy_name(self):
+        # pyperclip只在复制时用到 启动时不导入
+        import pyperclip
+        pyperclip.copy(f'{self.name_label.text()}{self.tag_label.text()}')
 
     def update_info(self, info):
         self.icon_widget.update_icon(info['icon'], info['xp'], info['level'])
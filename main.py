@@ -1,12 +1,24 @@
+import time
+
+started = time.time()
+
 import asyncio
 import sys
 
+from PyQt6.QtCore import QTimer
 from PyQt6.QtGui import QIcon
 from qasync import QApplication, QEventLoop
 
-from app.view.main_window import MainWindow
+# 启动画面只依赖PyQt6 配置和qfluentwidgets在它显示之后再导入
+from app.components.splash import SplashScreen
 
 if __name__ == '__main__':
+    from app.common.profiler import LoopProfiler, StartupTimer, profile_mode
+
+    # python main.py --startup-bench[=文件] 输出各阶段启动耗时后退出
+    startup = StartupTimer(started)
+    startup_bench = next((arg for arg in sys.argv[1:] if arg.split('=')[0] == '--startup-bench'), None)
+
     app = QApplication(sys.argv)
     app.setApplicationName('LOL助手')
 
@@ -21,11 +33,54 @@ if __name__ == '__main__':
     app.lastWindowClosed.connect(resolve_app_close_future)
     app.aboutToQuit.connect(resolve_app_close_future)
 
+    # 先显示启动画面 再导入配置 qfluentwidgets aiohttp等较重的模块和创建主窗口
+    splash = SplashScreen()
+    splash.setWindowIcon(QIcon('logo.ico'))
+    splash.setWindowTitle('LOL助手')
+    splash.setFixedSize(800, 600)
+    splash.show()
+    app.processEvents()
+    startup.mark('splash')
+
+    from app.common.config import load_config
+
+    load_config()
+    splash.show_progress()
+    app.processEvents()
+    startup.mark('config')
+
+    from app.view.main_window import MainWindow
+
+    startup.mark('import')
+
     w = MainWindow()
 
     w.setWindowIcon(QIcon('logo.ico'))
     w.setWindowTitle('LOL助手')
     w.setFixedSize(800, 600)
+    w.move(splash.pos())
     w.show()
+    splash.close()
+    app.processEvents()
+    startup.mark('main window')
+
+    if startup_bench:
+        startup.report(startup_bench.partition('=')[2])
+        QTimer.singleShot(0, w.close)
+
+    # python main.py --profile[=cprofile|yappi] 或 LOL_ASSIST_PROFILE=1
+    mode = profile_mode()
+    profiler = LoopProfiler(mode) if mode else None
+    if profiler:
+        from app.components.lag_overlay import LagOverlay
+
+        profiler.start(event_loop)
+        lag_overlay = LagOverlay(profiler, w)
+        lag_overlay.show()
+
     with event_loop:
+        # 上面的processEvents会在事件循环启动前执行已安排的协程 快照需要在运行的事件循环中读取
+        event_loop.create_task(w.load_snapshot())
         event_loop.run_until_complete(app_close_future)
+        if profiler:
+            profiler.stop()
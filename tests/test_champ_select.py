@@ -0,0 +1,200 @@
+import asyncio
+import copy
+
+import pytest
+
+from app.common.config import cfg
+from app.lol import champ_select
+from app.lol.champ_select import ChampSelectEngine
+from app.lol.policy import LcuStatusError, LcuTimeoutError
+from tools.fake_lcu import make_champ_select_session
+from tools.replay_champ_select import RecordingLcu, ban_sequence, draft_sequence, make_step
+
+PICK_ID = 1
+BAN_ID = 101
+
+
+@pytest.fixture(autouse=True)
+def config(monkeypatch):
+    values = {
+        cfg.wantSelectChamps: [157, 3, 22],
+        cfg.wantBanChamps: [238, 55, 11, 7],
+        cfg.enableAutoSelect: False,
+        cfg.enableAutoBan: True,
+        cfg.banHoverFirst: False,
+    }
+    for item, value in values.items():
+        monkeypatch.setattr(item, 'value', value)
+    monkeypatch.setattr(champ_select, 'BAN_HOVER_SECONDS', 0.05)
+
+
+class FailingLcu(RecordingLcu):
+    """记录请求 rejected中的英雄返回400 timeouts次数内的请求超时"""
+
+    def __init__(self, rejected=(), timeouts=0):
+        super().__init__()
+        self.rejected = set(rejected)
+        self.timeouts = timeouts
+
+    def check(self, champ_id):
+        if self.timeouts:
+            self.timeouts -= 1
+            raise LcuTimeoutError('timeout')
+        if champ_id in self.rejected:
+            raise LcuStatusError('rejected', 400)
+
+    async def select_champ(self, action_id, champ_id, completed=False):
+        await super().select_champ(action_id, champ_id, completed)
+        self.check(champ_id)
+
+    async def ban_champ(self, action_id, champ_id, completed=False):
+        await super().ban_champ(action_id, champ_id, completed)
+        self.check(champ_id)
+
+
+def replay(sequence, lcu=None):
+    lcu = lcu or RecordingLcu()
+    engine = ChampSelectEngine(lcu)
+
+    async def main():
+        for session in sequence:
+            await engine.update(session)
+
+    asyncio.run(main())
+    return lcu.requests
+
+
+def test_draft_hover_changes_when_taken():
+    # 157 22被队友预选 只能亮起3 3被选走且22不再被预选后改为22
+    assert replay(draft_sequence()) == [
+        ('pick', PICK_ID, 3, False),
+        ('pick', PICK_ID, 22, False),
+    ]
+
+
+def test_draft_locked_pick_is_not_changed():
+    cfg.enableAutoSelect.value = True
+    assert replay(draft_sequence()) == [('pick', PICK_ID, 3, True)]
+
+
+def test_same_session_twice_sends_once():
+    # session推送先于阶段变化到达 之后REST获取的同一个session不再重复发送
+    cfg.wantSelectChamps.value = [157]
+    session = make_champ_select_session()
+    assert replay([session, copy.deepcopy(session)]) == [('pick', PICK_ID, 157, False)]
+
+
+def test_manual_hover_is_not_overridden():
+    sequence = []
+    step = make_step(make_champ_select_session(in_progress=False), sequence)
+    step(actions={(0, 0): (0, False, False)})
+    step(actions={(0, 0): (99, True, False)})
+    step(intents={1: 99})
+    assert replay(sequence) == []
+
+
+def test_ban_priority_skips_intents_and_teammate_hovers():
+    # 238被队友预选 55被队友亮起禁用 按顺序取11并锁定 之后队友亮起11也不再更换
+    assert replay(ban_sequence()) == [('ban', BAN_ID, 11, True)]
+
+
+def test_ban_hover_changes_when_teammate_hovers_same():
+    cfg.enableAutoBan.value = False
+    assert replay(ban_sequence()) == [
+        ('ban', BAN_ID, 11, False),
+        ('ban', BAN_ID, 7, False),
+    ]
+
+
+def test_ban_hover_then_lock():
+    cfg.banHoverFirst.value = True
+    assert replay(ban_sequence()) == [
+        ('ban', BAN_ID, 11, False),
+        ('ban', BAN_ID, 11, True),
+    ]
+
+
+def test_ban_hover_then_lock_follows_changes_during_hover():
+    cfg.banHoverFirst.value = True
+    sequence = ban_sequence()
+    lcu = RecordingLcu()
+    engine = ChampSelectEngine(lcu)
+
+    async def main():
+        await engine.update(sequence[0])
+        # 亮起等待期间队友亮起了同一个英雄
+        hover = asyncio.create_task(engine.update(sequence[1]))
+        await asyncio.sleep(0)
+        await engine.update(sequence[2])
+        await hover
+
+    asyncio.run(main())
+    assert lcu.requests == [
+        ('ban', BAN_ID, 11, False),
+        ('ban', BAN_ID, 7, False),
+        ('ban', BAN_ID, 7, True),
+    ]
+
+
+def test_new_game_is_handled_again():
+    cfg.wantSelectChamps.value = [157]
+    first = make_champ_select_session()
+    first['gameId'] = 1
+    second = copy.deepcopy(first)
+    second['gameId'] = 2
+    assert replay([first, second]) == [('pick', PICK_ID, 157, False)] * 2
+
+
+@pytest.fixture
+def first_choice(monkeypatch):
+    monkeypatch.setattr(champ_select.random, 'choice', lambda seq: seq[0])
+
+
+def test_rejected_pick_tries_next_champion(first_choice):
+    session = make_champ_select_session()
+    # 157未拥有 客户端返回400 下一次推送改选3
+    lcu = FailingLcu(rejected={157})
+    assert replay([session, copy.deepcopy(session), copy.deepcopy(session)], lcu) == [
+        ('pick', PICK_ID, 157, False),
+        ('pick', PICK_ID, 3, False),
+    ]
+
+
+def test_failed_lock_is_retried(first_choice):
+    cfg.enableAutoSelect.value = True
+    session = make_champ_select_session()
+    lcu = FailingLcu(timeouts=1)
+    engine = ChampSelectEngine(lcu)
+
+    async def main():
+        for _ in range(3):
+            await engine.update(copy.deepcopy(session))
+
+    asyncio.run(main())
+    assert lcu.requests == [('pick', PICK_ID, 157, True), ('pick', PICK_ID, 3, True)]
+    assert engine.handled == {PICK_ID: 3}
+    assert engine.locked == {PICK_ID}
+
+
+def test_rejected_ban_lock_after_hover_is_retried():
+    cfg.banHoverFirst.value = True
+    sequence = ban_sequence()
+    # 亮起11成功 锁定11被拒绝 下一次推送从7开始重新亮起再锁定
+    lcu = FailingLcu()
+    engine = ChampSelectEngine(lcu)
+
+    async def main():
+        await engine.update(sequence[0])
+        hover = asyncio.create_task(engine.update(sequence[1]))
+        await asyncio.sleep(0)
+        lcu.rejected = {11}
+        await hover
+        await engine.update(copy.deepcopy(sequence[1]))
+
+    asyncio.run(main())
+    assert lcu.requests == [
+        ('ban', BAN_ID, 11, False),
+        ('ban', BAN_ID, 11, True),
+        ('ban', BAN_ID, 7, False),
+        ('ban', BAN_ID, 7, True),
+    ]
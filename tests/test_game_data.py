@@ -0,0 +1,121 @@
+import asyncio
+import os
+
+import pytest
+
+from app.common import icon_store
+from app.common.signals import signal_bus
+from app.lol.cache import GameDataCache
+from app.lol.lcu import Lcu
+from app.lol.policy import LcuStatusError
+from tools.fake_lcu import FakeLcu
+
+SUMMARY = '/lol-game-data/assets/v1/champion-summary.json'
+
+
+async def connect(tmp_path):
+    fake = await FakeLcu().start()
+    lcu = Lcu()
+    lcu.cache = GameDataCache(str(tmp_path / 'data'))
+    await lcu.connect(fake.port, fake.token)
+    return fake, lcu
+
+
+async def close(fake, lcu):
+    if lcu.icon_task:
+        lcu.icon_task.cancel()
+        lcu.icon_task = None
+    await lcu.close()
+    await fake.close()
+
+
+def test_error_response_is_not_cached(tmp_path):
+    async def main():
+        fake, lcu = await connect(tmp_path)
+        summary = fake.resources.pop(SUMMARY)
+        try:
+            # 客户端启动中 英雄数据返回404
+            with pytest.raises(LcuStatusError) as e:
+                await lcu.get_champions()
+            assert e.value.status == 404
+            assert not os.path.exists(tmp_path / 'data' / 'index.json')
+
+            fake.resources[SUMMARY] = summary
+            lcu.icon_task = asyncio.get_running_loop().create_future()  # 不下载图标
+            champs = await lcu.get_champions()
+            assert len(champs) == len(summary)
+        finally:
+            await close(fake, lcu)
+
+    asyncio.run(main())
+
+
+def test_cached_error_body_is_ignored(tmp_path):
+    async def main():
+        fake, lcu = await connect(tmp_path)
+        try:
+            version = await lcu.get_game_version()
+            # 磁盘上已有的错误响应
+            await lcu.cache.put(SUMMARY, version, b'{"errorCode":"RPC_ERROR","httpStatus":404,"message":""}')
+            lcu.cache.memory.clear()
+            lcu.icon_task = asyncio.get_running_loop().create_future()
+            champs = await lcu.get_champions()
+            assert len(champs) == len(fake.resources[SUMMARY])
+        finally:
+            await close(fake, lcu)
+
+    asyncio.run(main())
+
+
+def test_failed_icons_finish_progress(tmp_path, monkeypatch):
+    # 从空的打包文件开始 所有图标都需要下载
+    icon_store.close_champ_icon_store()
+    monkeypatch.setattr(icon_store, 'CHAMP_ICON_STORE', str(tmp_path / 'champ_icons.pack'))
+    monkeypatch.setattr(icon_store, '_pending', {})
+    progress = []
+    loaded = []
+
+    def on_progress(done, total):
+        progress.append((done, total))
+
+    def on_loaded(champ_id, icon):
+        loaded.append(champ_id)
+
+    async def main():
+        fake, lcu = await connect(tmp_path)
+        champ_id = fake.resources[SUMMARY][0]['id']
+        signal_bus.champ_icons_progress.connect(on_progress)
+        signal_bus.champ_icon_loaded.connect(on_loaded)
+        try:
+            # 99999没有图标 客户端返回404
+            await lcu.fetch_champ_icons([champ_id, 99999])
+            await icon_store.migrate_champ_icons(str(tmp_path / 'champ_icons'))
+        finally:
+            signal_bus.champ_icons_progress.disconnect(on_progress)
+            signal_bus.champ_icon_loaded.disconnect(on_loaded)
+            await close(fake, lcu)
+        return champ_id
+
+    champ_id = asyncio.run(main())
+    assert loaded == [champ_id]
+    assert progress[-1] == (2, 2)
+    assert list(icon_store.get_champ_icon_store().ids()) == [champ_id]
+    icon_store.close_champ_icon_store()
+
+
+def test_game_version_fallback(tmp_path):
+    async def main():
+        fake, lcu = await connect(tmp_path)
+        fake.resources.pop('/system/v1/builds')
+        try:
+            # 两个接口都返回404 不能把错误响应当作版本号
+            with pytest.raises(LcuStatusError):
+                await lcu.get_game_version()
+            assert lcu.game_version is None
+
+            fake.resources['/lol-patch/v1/game-version'] = '14.20.622.1234'
+            assert await lcu.get_game_version() == '14.20.622.1234'
+        finally:
+            await close(fake, lcu)
+
+    asyncio.run(main())
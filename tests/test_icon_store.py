@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from app.common import icon_store
+from app.common.icon_store import IconStore
+
+
+@pytest.fixture
+def store_file(tmp_path, monkeypatch):
+    icon_store.close_champ_icon_store()
+    file = str(tmp_path / 'champ_icons.pack')
+    monkeypatch.setattr(icon_store, 'CHAMP_ICON_STORE', file)
+    monkeypatch.setattr(icon_store, '_pending', {})
+    yield file
+    icon_store.close_champ_icon_store()
+
+
+def test_migrate_packs_loose_and_downloaded_icons(tmp_path, store_file):
+    IconStore.build([(1, b'old-1'), (2, b'old-2')], store_file)
+    directory = tmp_path / 'champ_icons'
+    directory.mkdir()
+    # 旧版本下载的png
+    (directory / '2.png').write_bytes(b'loose-2')
+    (directory / '3.png').write_bytes(b'loose-3')
+    icon_store.add_champ_icon(4, b'new-4')
+    assert icon_store.has_champ_icon(4)
+
+    asyncio.run(icon_store.migrate_champ_icons(str(directory)))
+
+    store = icon_store.get_champ_icon_store()
+    assert {champ_id: bytes(store.get(champ_id)) for champ_id in store.ids()} == {
+        1: b'old-1', 2: b'loose-2', 3: b'loose-3', 4: b'new-4'}
+    # 打包后散落的png和空目录被删除 下载的图标不再占用内存
+    assert not directory.exists()
+    assert icon_store._pending == {}
+
+
+def test_migrate_without_new_icons_keeps_store(tmp_path, store_file):
+    IconStore.build([(1, b'old-1')], store_file)
+    store = icon_store.get_champ_icon_store()
+
+    asyncio.run(icon_store.migrate_champ_icons(str(tmp_path / 'champ_icons')))
+
+    assert icon_store.get_champ_icon_store() is store
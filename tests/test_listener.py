@@ -0,0 +1,128 @@
+import os
+import time
+
+from PyQt6.QtCore import Qt
+
+from app.common.signals import signal_bus
+from app.common.utils import LCU_PROCESS_NAME, ProcessDiscovery
+from app.lol.listener import LcuProcessListener, LcuLockfileListener
+
+
+class FakeDiscovery(ProcessDiscovery):
+    """lcu_pids为当前的客户端进程 alive为仍在运行的进程"""
+
+    def __init__(self, lcu_pids=(), game=False):
+        self.lcu_pids = list(lcu_pids)
+        self.alive = set(lcu_pids)
+        self.game = game
+        self.scans = 0
+
+    def get_pids(self, name):
+        if name == LCU_PROCESS_NAME:
+            self.scans += 1
+            return self.lcu_pids
+        return [1] if self.game else []
+
+    def is_alive(self, pid):
+        return pid in self.alive
+
+    def wait_exit(self, pid, timeout):
+        if pid not in self.alive:
+            return True
+        time.sleep(timeout)
+        return pid not in self.alive
+
+
+def run_listener(discovery, seconds):
+    listener = LcuProcessListener(None, discovery)
+    listener.start()
+    try:
+        time.sleep(seconds)
+    finally:
+        listener.requestInterruption()
+        listener.wait()
+    return listener
+
+
+def test_client_started():
+    listener = run_listener(FakeDiscovery([100]), 0.2)
+    assert listener.running_pid == 100
+
+
+def test_client_exited_while_game_running_does_not_spin():
+    discovery = FakeDiscovery([100], game=True)
+    listener = LcuProcessListener(None, discovery)
+    listener.start()
+    try:
+        time.sleep(0.15)
+        discovery.lcu_pids = []
+        discovery.alive.clear()
+        discovery.scans = 0
+        time.sleep(0.5)
+    finally:
+        listener.requestInterruption()
+        listener.wait()
+    # 游戏仍在运行 running_pid保留 每100ms扫描一次
+    assert listener.running_pid == 100
+    assert discovery.scans <= 10
+
+
+def test_client_exited():
+    discovery = FakeDiscovery([100])
+    listener = LcuProcessListener(None, discovery)
+    listener.start()
+    try:
+        time.sleep(0.15)
+        discovery.lcu_pids = []
+        discovery.alive.clear()
+        time.sleep(0.2)
+    finally:
+        listener.requestInterruption()
+        listener.wait()
+    assert listener.running_pid == 0
+
+
+def test_lockfile_listener(tmp_path):
+    path = str(tmp_path / 'lockfile')
+    events = []
+    # 在监听线程中直接调用 不需要Qt事件循环
+    connections = [
+        (signal_bus.lcu_started, lambda pid: events.append(('started', pid))),
+        (signal_bus.lcu_changed, lambda pid: events.append(('changed', pid))),
+        (signal_bus.lcu_stopped, lambda: events.append(('stopped',))),
+    ]
+    for signal, slot in connections:
+        signal.connect(slot, Qt.ConnectionType.DirectConnection)
+
+    def write(text):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        time.sleep(0.3)
+
+    discovery = FakeDiscovery()
+    listener = LcuLockfileListener(None, path, discovery)
+    listener.start()
+    try:
+        time.sleep(0.2)
+        write('LeagueClient:99:50000:token:https')  # 上次崩溃留下的 进程不存在
+        write('LeagueClient:100:')  # 还没写完
+        discovery.alive = {100}
+        write('LeagueClient:100:50001:token:https')
+        discovery.alive = {100, 101}
+        write('LeagueClient:101:50002:token:https')  # 客户端重启 旧进程随后退出
+        discovery.alive = set()  # 崩溃 lockfile还在
+        time.sleep(0.3)
+        discovery.alive = {102}
+        write('LeagueClient:102:50003:token:https')
+        os.remove(path)
+        time.sleep(0.3)
+    finally:
+        listener.requestInterruption()
+        listener.wait()
+        for signal, slot in connections:
+            signal.disconnect(slot)
+
+    assert events == [('started', 100), ('changed', 101), ('stopped',), ('started', 102), ('stopped',)]
+    assert listener.running_pid == 0
@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+from app.common import utils
+from app.common.utils import LockfileWatcher, get_lcu_credentials, read_lockfile
+
+
+def write(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    # 保证mtime变化
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+@pytest.fixture
+def path(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, 'credentials', {})
+    return str(tmp_path / 'lockfile')
+
+
+def test_read_lockfile(path):
+    write(path, 'LeagueClient:1234:50001:token:https')
+    assert read_lockfile(path) == ('LeagueClient', 1234, '50001', 'token', 'https')
+
+
+def test_watcher_appear_rewrite_delete(path):
+    watcher = LockfileWatcher(path)
+    assert not watcher.poll()
+    assert watcher.lockfile is None
+
+    write(path, 'LeagueClient:1234:50001:token:https')
+    assert watcher.poll()
+    assert watcher.lockfile.port == '50001'
+    assert utils.credentials[1234] == ('50001', 'token')
+    # 没有变化时不重新读取
+    assert not watcher.poll()
+
+    write(path, 'LeagueClient:1234:50002:token2:https')
+    assert watcher.poll()
+    assert (watcher.lockfile.port, watcher.lockfile.password) == ('50002', 'token2')
+
+    os.remove(path)
+    assert watcher.poll()
+    assert watcher.lockfile is None
+    assert not watcher.poll()
+
+
+def test_watcher_partial_write(path):
+    watcher = LockfileWatcher(path)
+    write(path, 'LeagueClient:1234:')
+    # 没写完时不报告 下次继续读取
+    assert not watcher.poll()
+    assert watcher.lockfile is None
+
+    write(path, 'LeagueClient:1234:50001:token:https')
+    assert watcher.poll()
+    assert watcher.lockfile.pid == 1234
+
+
+class FakeProcess:
+    def __init__(self, pid, ppid, exe, cmdline=()):
+        self.pid = pid
+        self.parent = ppid
+        self.executable = exe
+        self.args = list(cmdline)
+
+    def exe(self):
+        return self.executable
+
+    def ppid(self):
+        return self.parent
+
+    def cmdline(self):
+        return self.args
+
+
+@pytest.fixture
+def ux_process(tmp_path, monkeypatch):
+    """LeagueClientUx.exe pid=200 父进程LeagueClient.exe pid=100 命令行中是另一组端口和token"""
+    process = FakeProcess(200, 100, str(tmp_path / 'LeagueClientUx.exe'),
+                          ['LeagueClientUx.exe', '--app-port=60000', '--remoting-auth-token=cmdline'])
+    monkeypatch.setattr(utils.psutil, 'Process', lambda pid: process)
+    monkeypatch.setattr(utils, 'credentials', {})
+    return process
+
+
+def test_credentials_from_lockfile_of_parent(path, ux_process):
+    write(path, 'LeagueClient:100:50001:token:https')
+    assert get_lcu_credentials(200) == ('50001', 'token')
+
+
+def test_credentials_stale_lockfile_uses_cmdline(path, ux_process):
+    write(path, 'LeagueClient:99:50001:old:https')
+    assert get_lcu_credentials(200) == ('60000', 'cmdline')
+
+
+def test_credentials_without_lockfile(ux_process):
+    assert get_lcu_credentials(200) == ('60000', 'cmdline')
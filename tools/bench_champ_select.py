@@ -0,0 +1,71 @@
+"""
+英雄选择界面打开耗时与内存: 旧实现(每个英雄一个RoundIconButton + FlowLayout) / 新实现(QListView只绘制可见项)
+
+QT_QPA_PLATFORM=offscreen python -m tools.bench_champ_select
+"""
+import gc
+import time
+
+import psutil
+from PyQt6.QtWidgets import QApplication, QWidget
+
+from app.common.pixmap_cache import pixmap_cache
+from app.lol.catalog import Champion
+from tools.bench_icon_store import make_champs
+
+opened = []
+
+
+def open_old(champs):
+    from qfluentwidgets import SmoothScrollArea, FlowLayout
+    from app.components.round_widget import RoundIconButton
+
+    scroll_area = SmoothScrollArea()
+    scroll_area.setFixedSize(300, 295)
+    widget = QWidget()
+    layout = FlowLayout(widget, needAni=True, isTight=True)
+    for champ in champs:
+        layout.addWidget(RoundIconButton(champ))
+    scroll_area.setWidget(widget)
+    scroll_area.setWidgetResizable(True)
+    return scroll_area
+
+
+def open_new(champs):
+    from app.components.champ_select_widget import ChampListModel, ChampListView
+
+    view = ChampListView()
+    view.setFixedSize(300, 295)
+    view.setModel(ChampListModel(champs))
+    return view
+
+
+def measure(open_func, champs):
+    pixmap_cache.clear()
+    gc.collect()
+    process = psutil.Process()
+    rss = process.memory_info().rss
+    start = time.perf_counter()
+    widget = open_func(champs)
+    widget.grab()
+    elapsed = time.perf_counter() - start
+    memory = process.memory_info().rss - rss
+    # FlowLayout的动画回调在控件删除后仍会触发 保留引用直到退出
+    opened.append(widget)
+    return elapsed, memory
+
+
+def main():
+    app = QApplication([])
+    champs = make_champs()
+    for scale in (1, 5):
+        roster = [Champion(champ.id + i * 10000, champ.name, champ.alias, icon=champ.icon)
+                  for i in range(scale) for champ in champs]
+        for name, func in (('old', open_old), ('new', open_new)):
+            elapsed, memory = measure(func, roster)
+            print(f'{name} {len(roster):>4} champs: open {elapsed * 1000:8.1f}ms  rss +{memory / 1024 / 1024:6.1f}MiB')
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+websocket帧解码对比: 旧实现(每帧json.loads两次) / FrameDecoder(解析一次 未订阅的uri直接丢弃)
+
+python -m tools.bench_decoder
+"""
+import json
+import time
+
+from app.lol import decoder
+from app.lol.decoder import FrameDecoder
+from app.lol.router import EventRouter
+from tools.fake_lcu import make_champ_select_session
+
+ROUNDS = 5000
+
+
+def make_frames():
+    session = make_champ_select_session()
+    session['chatDetails'] = {'mucJwtDto': {'jwt': 'x' * 2000}}
+    events = [
+        ('OnJsonApiEvent_lol-champ-select_v1_session', '/lol-champ-select/v1/session', session),
+        # 订阅了前缀事件 但该uri没有对应的回调
+        ('OnJsonApiEvent_lol-champ-select_v1_session', '/lol-champ-select/v1/session/timer', session['timer']),
+        ('OnJsonApiEvent_lol-inventory_v1_wallet', '/lol-inventory/v1/wallet/RP', {'RP': 100}),
+        ('OnJsonApiEvent_lol-inventory_v1_wallet', '/lol-inventory/v1/wallet/lol_coin', {'lol_coin': 1}),
+    ]
+    return [json.dumps([8, event, {'data': data, 'eventType': 'Update', 'uri': uri}]) for event, uri, data in events]
+
+
+def main():
+    frames = make_frames() * ROUNDS
+    router = EventRouter()
+    for uri in ('/lol-champ-select/v1/session', '/lol-inventory/v1/wallet/RP'):
+        router.add(uri, ('Update',), None)
+
+    start = time.perf_counter()
+    for text in frames:
+        json.loads(text)[1]
+        json.loads(text)[2]
+    old = time.perf_counter() - start
+
+    frame_decoder = FrameDecoder(router)
+    start = time.perf_counter()
+    for text in frames:
+        frame_decoder.decode(text)
+    new = time.perf_counter() - start
+
+    print(f'json backend: {decoder.loads.__module__}')
+    print(f'old double json.loads: {len(frames) / old:>10,.0f} frames/s')
+    print(f'FrameDecoder:          {len(frames) / new:>10,.0f} frames/s')
+    print(frame_decoder.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+英雄图标读取: 散落的png(旧版本) / 打包文件(mmap)
+以及英雄选择界面从创建到第一次绘制完成的耗时 png由仓库中的打包文件解出到临时目录
+
+QT_QPA_PLATFORM=offscreen python -m tools.bench_icon_store
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+from PyQt6.QtGui import QPixmap, QPixmapCache
+from PyQt6.QtWidgets import QApplication
+
+from app.common import icon_store
+from app.common.icon_store import CHAMP_ICON_DIR, IconStore
+from app.common.pixmap_cache import pixmap_cache
+from app.components.champ_select_widget import ChampSelectWidget
+from app.lol.catalog import Champion, ChampionCatalog
+from tools.fake_lcu import load_icons
+
+
+def make_champs(directory=CHAMP_ICON_DIR):
+    ids = sorted(load_icons())
+    return [Champion(i, f'英雄{i}', f'Champ{i}', icon=f'{directory}/{i}.png') for i in ids]
+
+
+def extract(directory):
+    """按旧版本的方式每个英雄一个png"""
+    for champ_id, data in load_icons().items():
+        with open(f'{directory}/{champ_id}.png', 'wb') as f:
+            f.write(data)
+
+
+def first_paint(champs):
+    # 两次测量都不使用已缓存的图标 QPixmap(文件名)也会存入QPixmapCache
+    pixmap_cache.clear()
+    QPixmapCache.clear()
+    start = time.perf_counter()
+    widget = ChampSelectWidget(ChampionCatalog(champs), [])
+    widget.grab()
+    elapsed = time.perf_counter() - start
+    widget.deleteLater()
+    return elapsed
+
+
+def main():
+    app = QApplication([])
+    # 不使用仓库中的打包文件 先测量只有png时的耗时
+    directory = tempfile.mkdtemp()
+    extract(directory)
+    icon_store.close_champ_icon_store()
+    icon_store.CHAMP_ICON_STORE = os.path.join(directory, 'champ_icons.pack')
+    champs = make_champs(directory)
+
+    start = time.perf_counter()
+    for champ in champs:
+        QPixmap(champ.icon)
+    print(f'load {len(champs)} pixmaps from png files: {(time.perf_counter() - start) * 1000:8.1f}ms')
+
+    # 第一次创建和绘制时的一次性初始化(拼音索引等)不计入 只绘制一个英雄不够
+    first_paint(champs)
+    print(f'first paint without store:          {first_paint(champs) * 1000:8.1f}ms')
+
+    start = time.perf_counter()
+    asyncio.run(icon_store.migrate_champ_icons(directory))
+    print(f'migrate directory to store:         {(time.perf_counter() - start) * 1000:8.1f}ms')
+    champs = make_champs()
+
+    start = time.perf_counter()
+    store = IconStore(icon_store.CHAMP_ICON_STORE)
+    for champ in champs:
+        pixmap = QPixmap()
+        pixmap.loadFromData(store.get(champ.id))
+    print(f'load {len(champs)} pixmaps from store:       {(time.perf_counter() - start) * 1000:8.1f}ms')
+    store.close()
+
+    print(f'first paint with store:             {first_paint(champs) * 1000:8.1f}ms')
+    icon_store.close_champ_icon_store()
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+冷缓存下载全部英雄图标: 旧实现(逐个await 阻塞写文件) / 并发下载后一次写入打包文件
+
+python -m tools.bench_icons [模拟客户端每个请求耗时(秒)]
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from app.common import icon_store
+from app.common.icon_store import IconStore
+from app.lol.lcu import Lcu
+from tools.fake_lcu import FakeLcu
+
+
+async def sequential(lcu, champ_ids, directory):
+    """旧实现"""
+    for champ_id in champ_ids:
+        resp = await lcu.request('get', f'/lol-game-data/assets/v1/champion-icons/{champ_id}.png')
+        with open(f'{directory}/{champ_id}.png', 'wb') as f:
+            f.write(await resp.read())
+
+
+async def main(delay=0.005):
+    fake = await FakeLcu(delay=delay).start()
+    lcu = Lcu()
+    try:
+        await lcu.connect(fake.port, fake.token)
+        champ_ids = [champ['id'] for champ in fake.resources['/lol-game-data/assets/v1/champion-summary.json']]
+
+        directory = tempfile.mkdtemp()
+        start = time.perf_counter()
+        await sequential(lcu, champ_ids, directory)
+        print(f'sequential:     {len(champ_ids)} icons {(time.perf_counter() - start) * 1000:8.1f}ms')
+        shutil.rmtree(directory)
+
+        saved = icon_store.CHAMP_ICON_STORE
+        icon_store.close_champ_icon_store()
+        try:
+            for concurrency in (4, 16):
+                # 每次从空的打包文件开始
+                directory = tempfile.mkdtemp()
+                icon_store.CHAMP_ICON_STORE = os.path.join(directory, 'champ_icons.pack')
+                start = time.perf_counter()
+                await lcu.fetch_champ_icons(champ_ids, concurrency)
+                await icon_store.migrate_champ_icons(directory)
+                elapsed = time.perf_counter() - start
+                icon_store.close_champ_icon_store()
+                store = IconStore(icon_store.CHAMP_ICON_STORE)
+                assert len(store.ids()) == len(champ_ids)
+                store.close()
+                print(f'concurrency={concurrency:<3} {len(champ_ids)} icons {elapsed * 1000:8.1f}ms')
+                shutil.rmtree(directory)
+        finally:
+            icon_store.CHAMP_ICON_STORE = saved
+    finally:
+        await lcu.close()
+        await fake.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(*map(float, sys.argv[1:])))
@@ -0,0 +1,152 @@
+"""
+端到端延迟测试: 事件推送到websocket -> 对应请求到达模拟客户端
+
+python -m tools.bench_latency [次数]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+from app.common.config import cfg
+from app.common.signals import signal_bus
+from app.lol import connection, lcu as lcu_module
+from app.lol.lcu import Lcu
+from tools.fake_lcu import FakeLcu, make_champ_select_session, make_ready_check
+
+GAMEFLOW_PHASE = '/lol-gameflow/v1/gameflow-phase'
+
+
+def report(name, samples):
+    """输出 p50 / p99 (毫秒)"""
+    ms = sorted(s * 1000 for s in samples)
+    p50 = statistics.median(ms)
+    p99 = ms[min(len(ms) - 1, int(len(ms) * 0.99))]
+    print(f'{name:<24} n={len(ms):<5} p50={p50:8.3f}ms  p99={p99:8.3f}ms  max={ms[-1]:8.3f}ms')
+
+
+def connect_automation(lcu):
+    """与 MainWindow 相同的阶段处理 ready-check和英雄选择session由Lcu在websocket任务中直接处理"""
+
+    async def on_game_status_changed(status):
+        if status != 'ChampSelect':
+            lcu.champ_select.reset()
+        match status:
+            case 'ReadyCheck':
+                await lcu.accept_ready_check()
+
+    # asyncSlot 同样是把协程包装成task
+    signal_bus.game_status_changed.connect(lambda status: asyncio.ensure_future(on_game_status_changed(status)))
+
+
+async def measure(fake, events, method, path, rounds):
+    """依次推送events, 记录最后一个事件推送到请求到达的时间"""
+    samples = []
+    for _ in range(rounds):
+        await fake.publish(GAMEFLOW_PHASE, 'Matchmaking')
+        await asyncio.sleep(0.005)
+        waiter = fake.wait_request(method, path)
+        for uri, data in events[:-1]:
+            await fake.publish(uri, data)
+        start = time.perf_counter()
+        await fake.publish(*events[-1])
+        request = await asyncio.wait_for(waiter, 5)
+        samples.append(request.time - start)
+    return samples
+
+
+async def duplicate_accepts(fake, rounds=20):
+    """ready-check推送后接着推送ReadyCheck阶段 MainWindow的补充接受不应重复发送请求"""
+    path = '/lol-matchmaking/v1/ready-check/accept'
+    before = sum(r.path == path for r in fake.requests)
+    for _ in range(rounds):
+        await fake.publish(GAMEFLOW_PHASE, 'Matchmaking')
+        await fake.publish('/lol-matchmaking/v1/ready-check', make_ready_check())
+        await fake.publish(GAMEFLOW_PHASE, 'ReadyCheck')
+        await asyncio.sleep(0.02)
+    return sum(r.path == path for r in fake.requests) - before - rounds
+
+
+async def first_accept(fake, prewarm, rounds=10):
+    """新连接上的第一次接受对局 对比是否预热连接"""
+    samples = []
+    for _ in range(rounds):
+        lcu = Lcu()
+        await lcu.connect(fake.port, fake.token)
+        await fake.wait_subscribed('OnJsonApiEvent_lol-gameflow_v1_gameflow-phase')
+        if prewarm:
+            await lcu.prewarm()
+        waiter = fake.wait_request('POST', '/lol-matchmaking/v1/ready-check/accept')
+        start = time.perf_counter()
+        await lcu.matchmaking_accept()
+        samples.append((await waiter).time - start)
+        await lcu.close()
+    return samples
+
+
+async def accept_after_idle(fake, keep_warm, rounds=5, keepalive=0.5, idle=1.5):
+    """
+    预热后排队超过keepalive才接受对局(实际为120秒 这里按比例缩短为keepalive秒)
+    对比只在开始寻找对局时预热一次 与Lcu.prewarm定期重新使用连接
+    """
+    saved = connection.KEEPALIVE_TIMEOUT, lcu_module.KEEP_WARM_INTERVAL
+    connection.KEEPALIVE_TIMEOUT, lcu_module.KEEP_WARM_INTERVAL = keepalive, keepalive / 4
+    samples = []
+    reused = 0
+    try:
+        for _ in range(rounds):
+            lcu = Lcu()
+            await lcu.connect(fake.port, fake.token)
+            await fake.wait_subscribed('OnJsonApiEvent_lol-gameflow_v1_gameflow-phase')
+            before = len(fake.requests)
+            if keep_warm:
+                await lcu.prewarm()
+            else:
+                await lcu.connection.prewarm()
+            warm = {request.peer for request in fake.requests[before:]}
+            await asyncio.sleep(idle)
+            waiter = fake.wait_request('POST', '/lol-matchmaking/v1/ready-check/accept')
+            start = time.perf_counter()
+            await lcu.matchmaking_accept()
+            request = await waiter
+            samples.append(request.time - start)
+            reused += request.peer in warm
+            await lcu.close()
+    finally:
+        connection.KEEPALIVE_TIMEOUT, lcu_module.KEEP_WARM_INTERVAL = saved
+    print(f'{"prewarmed connection":<24} {reused}/{rounds}')
+    return samples
+
+
+async def main(rounds=200):
+    fake = await FakeLcu().start()
+    lcu = Lcu()
+    try:
+        await lcu.connect(fake.port, fake.token)
+        await fake.wait_subscribed('OnJsonApiEvent_lol-gameflow_v1_gameflow-phase')
+        connect_automation(lcu)
+        cfg.enableAutoAccept.value = True
+
+        ready_check = [('/lol-matchmaking/v1/ready-check', make_ready_check()), (GAMEFLOW_PHASE, 'ReadyCheck')]
+        report('ready-check -> accept', await measure(
+            fake, ready_check[:1], 'POST', '/lol-matchmaking/v1/ready-check/accept', rounds))
+        report('accept (in process)', [latency for latency, _ in lcu.accept_latencies])
+        print(f'{"duplicate accepts":<24} {await duplicate_accepts(fake)}')
+
+        champ_select = [('/lol-champ-select/v1/session', make_champ_select_session())]
+        report('session -> pick', await measure(
+            fake, champ_select, 'PATCH', '/lol-champ-select/v1/session/actions/1', rounds))
+    finally:
+        await lcu.close()
+
+    try:
+        report('first accept (cold)', await first_accept(fake, False))
+        report('first accept (prewarm)', await first_accept(fake, True))
+        report('idle accept (once)', await accept_after_idle(fake, False))
+        report('idle accept (keep warm)', await accept_after_idle(fake, True))
+    finally:
+        await fake.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(*map(int, sys.argv[1:])))
@@ -0,0 +1,56 @@
+"""
+请求统计的开销: 关闭 / 开启 时每次请求的耗时 以及直方图记录一次的耗时
+结束后导出一份统计到临时目录
+
+python -m tools.bench_metrics [次数]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from app.lol.lcu import Lcu
+from app.lol.metrics import Histogram, metrics
+from tools.fake_lcu import FakeLcu
+
+
+async def request_time(lcu, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        resp = await lcu.request('get', '/lol-gameflow/v1/gameflow-phase')
+        await resp.read()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+async def main(rounds=2000):
+    histogram = Histogram()
+    start = time.perf_counter()
+    for i in range(100000):
+        histogram.record(i % 5000)
+    print(f'histogram record: {(time.perf_counter() - start) / 100000 * 1e9:8.1f}ns')
+
+    fake = await FakeLcu().start()
+    lcu = Lcu()
+    try:
+        await lcu.connect(fake.port, fake.token)
+        await request_time(lcu, 100)
+        for enabled in (False, True, False, True):
+            metrics.enabled = enabled
+            print(f'request p50 metrics {"on " if enabled else "off"}: {await request_time(lcu, rounds):8.1f}us')
+    finally:
+        await lcu.close()
+        await fake.close()
+
+    directory = tempfile.mkdtemp()
+    metrics.export_json(os.path.join(directory, 'metrics.json'))
+    metrics.export_csv(os.path.join(directory, 'metrics.csv'))
+    with open(os.path.join(directory, 'metrics.csv'), encoding='utf-8') as f:
+        print(f.read())
+
+
+if __name__ == '__main__':
+    asyncio.run(main(*map(int, sys.argv[1:])))
@@ -0,0 +1,47 @@
+"""
+RoundIcon / RoundIconButton / AvatarWidget 每次重绘耗时
+未命中缓存(每次都裁剪缩放 与旧实现相同) / 命中缓存(只drawPixmap)
+
+QT_QPA_PLATFORM=offscreen python -m tools.bench_paint
+"""
+import time
+
+from PyQt6.QtWidgets import QApplication
+
+from app.common.pixmap_cache import pixmap_cache
+from app.lol.catalog import Champion
+
+ROUNDS = 300
+CHAMP_ICON = 'app/resource/game/champ_icons/157.png'
+PROFILE_ICON = 'app/resource/game/profile_icons/16.jpg'
+
+
+def paint_time(widget, clear):
+    widget.grab()
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        if clear:
+            pixmap_cache.clear()
+        widget.grab()
+    return (time.perf_counter() - start) / ROUNDS
+
+
+def main():
+    app = QApplication([])
+    from app.components.avatar_widget import AvatarWidget
+    from app.components.round_widget import RoundIcon, RoundIconButton
+
+    widgets = {
+        'RoundIcon': RoundIcon(CHAMP_ICON, 28, 2, 2),
+        'RoundIconButton': RoundIconButton(Champion(157, '', '', icon=CHAMP_ICON)),
+        'AvatarWidget': AvatarWidget(PROFILE_ICON),
+    }
+    for name, widget in widgets.items():
+        miss = paint_time(widget, True)
+        hit = paint_time(widget, False)
+        print(f'{name:<16} uncached {miss * 1e6:8.1f}us  cached {hit * 1e6:8.1f}us')
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
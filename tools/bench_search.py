@@ -0,0 +1,59 @@
+"""
+英雄搜索: 建索引耗时 以及逐字输入时每次查询的耗时(对比线性扫描)
+已选英雄id -> 图标: 列表推导逐个查找 / ChampionCatalog.icons
+
+python -m tools.bench_search
+"""
+import time
+
+from app.lol.catalog import Champion, ChampionCatalog
+
+NAMES = ['疾风剑豪', '无极剑圣', '暗夜猎手', '寒冰射手', '九尾妖狐', '德玛西亚之力', '诺克萨斯之手', '蒸汽机器人',
+         '盲僧', '探险家', '虚空之女', '光辉女郎', '皮城女警', '德邦总管', '刀锋之影', '影流之主']
+ROLES = ['assassin', 'fighter', 'mage', 'marksman', 'support', 'tank']
+QUERIES = ['j', 'ji', 'jif', 'jifeng', '疾风', 'jfjh', 'Champ1', 'mage', 'ma jf', 'xyz']
+ROUNDS = 1000
+
+
+def make_champs(n=170):
+    return [Champion(i, f'{NAMES[i % len(NAMES)]}{i}', f'Champ{i}',
+                     roles=[ROLES[i % len(ROLES)], ROLES[(i + 2) % len(ROLES)]])
+            for i in range(1, n + 1)]
+
+
+def linear_search(champs, text):
+    """旧方式: 每次遍历全部英雄比较名称和别名"""
+    words = text.lower().split()
+    return [c for c in champs if all(w in c.name.lower() or w in c.alias.lower() for w in words)]
+
+
+def main():
+    champs = make_champs()
+
+    start = time.perf_counter()
+    catalog = ChampionCatalog(champs)
+    print(f'build index for {len(champs)} champs: {(time.perf_counter() - start) * 1000:8.2f}ms '
+          f'({len(catalog.index)} terms)')
+
+    for name, search in (('linear', lambda q: linear_search(champs, q)), ('index', catalog.search)):
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            for query in QUERIES:
+                search(query)
+        per_query = (time.perf_counter() - start) / (ROUNDS * len(QUERIES)) * 1e6
+        print(f'{name:>6}: {per_query:8.2f}us/query')
+
+    selected = [champ.id for champ in champs[::17]]
+    for name, icons in (('linear', lambda: [[c for c in champs if c.id == i][0].icon for i in selected]),
+                        ('index', lambda: catalog.icons(selected))):
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            icons()
+        print(f'{name:>6}: {(time.perf_counter() - start) / ROUNDS * 1e6:8.2f}us/{len(selected)} icons')
+
+    for query in QUERIES:
+        print(f'{query!r:>10} -> {len(catalog.search(query))}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+冷启动耗时: 多次运行 main.py --startup-bench 输出各阶段(启动画面 配置 导入 主窗口)的中位数
+默认启动 python main.py 也可以传入打包后的程序路径(pyinstaller main.spec 生成 dist/LOL助手/)
+结果通过 --startup-bench=文件 读取 打包为窗口程序时没有stdout
+--importtime 输出导入主窗口时最耗时的模块
+
+python -m tools.bench_startup [次数] [程序路径]
+python -m tools.bench_startup --importtime
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+LINE = re.compile(r'^startup (.+?)\s+([\d.]+)ms\s+process\s+([\d.?]+)')
+
+
+def run(command):
+    fd, file = tempfile.mkstemp(suffix='.txt')
+    os.close(fd)
+    try:
+        subprocess.run(command + [f'--startup-bench={file}'], capture_output=True, timeout=60)
+        with open(file, encoding='utf-8') as f:
+            output = f.read()
+    finally:
+        os.remove(file)
+    marks = {}
+    for line in output.splitlines():
+        match = LINE.match(line)
+        if match:
+            name, since_main, since_process = match.groups()
+            marks[name] = (float(since_main), None if since_process == '?' else float(since_process))
+    return marks
+
+
+def bench(rounds=5, program=None):
+    command = [program] if program else [sys.executable, 'main.py']
+    # 没有显示器时使用offscreen
+    if sys.platform.startswith('linux') and not os.environ.get('DISPLAY'):
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    results = defaultdict(list)
+    for _ in range(rounds):
+        for name, value in run(command).items():
+            results[name].append(value)
+
+    print(f'{" ".join(command)}  x{rounds}')
+    for name, values in results.items():
+        since_main = statistics.median(value[0] for value in values)
+        process = [value[1] for value in values if value[1] is not None]
+        process = f'{statistics.median(process):8.1f}ms' if process else '       ?'
+        print(f'{name:<12} main.py {since_main:8.1f}ms  process {process}')
+
+
+def import_time(top=15):
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app.view.main_window'],
+                            capture_output=True, text=True).stderr
+    rows = []
+    for line in output.splitlines()[1:]:
+        _, _, cumulative, name = [part.strip() for part in re.split(r'[:|]', line, maxsplit=3)]
+        if cumulative.isdigit():
+            rows.append((int(cumulative), name))
+    for cumulative, name in sorted(rows, reverse=True)[:top]:
+        print(f'{cumulative / 1000:8.1f}ms  {name}')
+
+
+if __name__ == '__main__':
+    if '--importtime' in sys.argv:
+        import_time()
+    else:
+        args = sys.argv[1:]
+        bench(int(args[0]) if args else 5, args[1] if len(args) > 1 else None)
@@ -0,0 +1,278 @@
+"""
+本地模拟客户端(LCU)
+
+HTTPS REST + WAMP风格websocket([5, event]订阅 / [8, event, payload]推送)，
+用于在没有真实客户端的情况下调试和做性能测试
+
+python -m tools.fake_lcu  启动后按脚本循环回放 Lobby -> Matchmaking -> ReadyCheck -> ChampSelect
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import ssl
+import subprocess
+import tempfile
+import time
+
+from aiohttp import web, WSMsgType
+
+from app.common.icon_store import IconStore
+
+# 测试中会把 icon_store.CHAMP_ICON_STORE 换成临时文件 这里固定读取仓库中的
+ICON_STORE = 'app/resource/game/champ_icons.pack'
+PROFILE_ICON_DIR = 'app/resource/game/profile_icons'
+
+SUMMONER = {
+    'summonerId': 1,
+    'puuid': 'fake-puuid',
+    'gameName': '测试玩家',
+    'tagLine': '00001',
+    'profileIconId': 16,
+    'summonerLevel': 30,
+    'xpSinceLastLevel': 100,
+    'xpUntilNextLevel': 2000,
+    'privacy': 'PUBLIC',
+}
+
+
+def make_champ_select_session(local_cell_id=0, action_id=1, in_progress=True, ban_turn=False):
+    """生成一个轮到本地玩家pick的英雄选择session ban_turn时在pick之前加一轮ban(id从action_id+100开始)"""
+    my_team = [{'cellId': i, 'championId': 0, 'championPickIntent': 0, 'summonerId': i + 1} for i in range(5)]
+    their_team = [{'cellId': i, 'championId': 0, 'championPickIntent': 0, 'summonerId': 0} for i in range(5, 10)]
+    actions = [[{'id': action_id + i, 'actorCellId': i, 'championId': 0, 'completed': False,
+                 'isAllyAction': i < 5, 'isInProgress': in_progress, 'type': 'pick'} for i in range(10)]]
+    if ban_turn:
+        actions.insert(0, [{'id': action_id + 100 + i, 'actorCellId': i, 'championId': 0, 'completed': False,
+                            'isAllyAction': i < 5, 'isInProgress': False, 'type': 'ban'} for i in range(10)])
+    return {
+        'localPlayerCellId': local_cell_id,
+        'myTeam': my_team,
+        'theirTeam': their_team,
+        'actions': actions,
+        'bans': {'myTeamBans': [], 'theirTeamBans': [], 'numBans': 0},
+        'timer': {'phase': 'BAN_PICK', 'adjustedTimeLeftInPhase': 30000},
+    }
+
+
+def make_ready_check(state='InProgress', player_response='None', timer=0.0):
+    return {'state': state, 'playerResponse': player_response, 'timer': timer,
+            'declinerIds': [], 'dodgeWarning': 'None', 'suppressUx': False}
+
+
+# 脚本: (延迟秒数, uri, data)
+GAMEFLOW_SCRIPT = [
+    (0.5, '/lol-gameflow/v1/gameflow-phase', 'Lobby'),
+    (0.5, '/lol-gameflow/v1/gameflow-phase', 'Matchmaking'),
+    (1.0, '/lol-matchmaking/v1/ready-check', make_ready_check()),
+    (0.0, '/lol-gameflow/v1/gameflow-phase', 'ReadyCheck'),
+    (1.0, '/lol-gameflow/v1/gameflow-phase', 'ChampSelect'),
+    (0.0, '/lol-champ-select/v1/session', make_champ_select_session()),
+]
+
+
+def event_name(uri):
+    """/lol-gameflow/v1/gameflow-phase -> OnJsonApiEvent_lol-gameflow_v1_gameflow-phase"""
+    return 'OnJsonApiEvent' + uri.replace('/', '_')
+
+
+def create_ssl_context():
+    """用openssl生成一次性的自签名证书"""
+    tmp = tempfile.mkdtemp(prefix='fake_lcu_')
+    cert, key = os.path.join(tmp, 'cert.pem'), os.path.join(tmp, 'key.pem')
+    subprocess.check_call(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                           '-subj', '/CN=127.0.0.1', '-keyout', key, '-out', cert],
+                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+_icons = None
+
+
+def load_icons():
+    """仓库中打包的英雄图标 id -> png 只读取一次"""
+    global _icons
+    if _icons is None:
+        store = IconStore(ICON_STORE)
+        _icons = {champ_id: bytes(store.get(champ_id)) for champ_id in store.ids()}
+        store.close()
+    return _icons
+
+
+class RecordedRequest:
+    __slots__ = ('method', 'path', 'body', 'time', 'peer')
+
+    def __init__(self, method, path, body, t, peer=None):
+        self.method = method
+        self.path = path
+        self.body = body
+        self.time = t
+        self.peer = peer  # 客户端地址和端口 同一个值即同一个TCP连接
+
+
+class FakeLcu:
+    def __init__(self, token='fake-token', pid=0, delay=0.0):
+        self.token = token
+        self.pid = pid
+        self.delay = delay  # 模拟客户端处理请求的耗时
+        self.port = 0
+        self.requests = []
+        self.sockets = {}  # ws -> 已订阅的事件
+        self.waiters = []
+        self.resources = {
+            '/lol-gameflow/v1/gameflow-phase': 'None',
+            '/lol-summoner/v1/current-summoner': SUMMONER,
+            '/lol-inventory/v1/wallet/RP': {'RP': 100},
+            '/lol-inventory/v1/wallet/lol_blue_essence': {'lol_blue_essence': 2000},
+            '/lol-inventory/v1/wallet/lol_orange_essence': {'lol_orange_essence': 300},
+            '/lol-matchmaking/v1/ready-check': make_ready_check(state='Invalid'),
+            '/lol-champ-select/v1/session': make_champ_select_session(),
+            '/lol-game-data/assets/v1/champion-summary.json': self.__champion_summary(),
+            '/system/v1/builds': {'version': '14.20.622.1234'},
+        }
+        self.app = web.Application(middlewares=[self.__auth_middleware])
+        self.app.router.add_get('/', self.__on_ws)
+        self.app.router.add_route('*', '/{path:.*}', self.__on_request)
+        self.runner = None
+
+    @staticmethod
+    def __champion_summary():
+        ids = sorted(load_icons())
+        return [{'id': i, 'name': f'英雄{i}', 'alias': f'Champ{i}', 'roles': ['fighter'],
+                 'squarePortraitPath': f'/lol-game-data/assets/v1/champion-icons/{i}.png'} for i in ids]
+
+    @web.middleware
+    async def __auth_middleware(self, request, handler):
+        expected = 'Basic ' + base64.b64encode(f'riot:{self.token}'.encode()).decode()
+        if request.headers.get('Authorization') != expected:
+            return web.json_response({'httpStatus': 401, 'message': 'Unauthorized'}, status=401)
+        return await handler(request)
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', self.port, ssl_context=create_ssl_context())
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        for ws in list(self.sockets):
+            await ws.close()
+        if self.runner:
+            await self.runner.cleanup()
+
+    async def __on_ws(self, request):
+        if request.headers.get('Upgrade', '').lower() != 'websocket':
+            return await self.__on_request(request)
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets[ws] = set()
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                opcode, event = json.loads(msg.data)[:2]
+                if opcode == 5:
+                    self.sockets[ws].add(event)
+                elif opcode == 6:
+                    self.sockets[ws].discard(event)
+        finally:
+            self.sockets.pop(ws, None)
+        return ws
+
+    async def __on_request(self, request):
+        body = await request.read()
+        record = RecordedRequest(request.method, request.path, json.loads(body) if body else None,
+                                 time.perf_counter(), request.transport.get_extra_info('peername'))
+        self.requests.append(record)
+        for waiter in list(self.waiters):
+            method, path, future = waiter
+            if method == record.method and path == record.path and not future.done():
+                future.set_result(record)
+                self.waiters.remove(waiter)
+
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        path = request.path
+        if request.method != 'GET':
+            if path == '/lol-matchmaking/v1/ready-check/accept':
+                ready_check = dict(self.resources['/lol-matchmaking/v1/ready-check'], playerResponse='Accepted')
+                asyncio.create_task(self.publish('/lol-matchmaking/v1/ready-check', ready_check))
+            return web.json_response(None)
+        if path.startswith('/lol-game-data/assets/v1/champion-icons/'):
+            data = load_icons().get(int(path.rsplit('/', 1)[-1].split('.')[0]))
+            return web.Response(status=404) if data is None else web.Response(body=data, content_type='image/png')
+        if path.startswith('/lol-game-data/assets/v1/profile-icons/'):
+            return self.__file_response(PROFILE_ICON_DIR, path)
+        if path == '/lol-inventory/v1/wallet':
+            wallet = {}
+            for currency in json.loads(request.query.get('currencyTypes', '[]')):
+                wallet.update(self.resources.get(f'/lol-inventory/v1/wallet/{currency}', {}))
+            return web.json_response(wallet)
+        if path in self.resources:
+            body = json.dumps(self.resources[path], ensure_ascii=False).encode('utf-8')
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            if request.headers.get('If-None-Match') == etag:
+                return web.Response(status=304, headers={'ETag': etag})
+            return web.Response(body=body, content_type='application/json', headers={'ETag': etag})
+        return web.json_response({'errorCode': 'RPC_ERROR', 'httpStatus': 404,
+                                  'message': f'Invalid URI format: {path}'}, status=404)
+
+    @staticmethod
+    def __file_response(directory, path):
+        file = os.path.join(directory, path.rsplit('/', 1)[-1])
+        if not os.path.exists(file):
+            return web.Response(status=404)
+        return web.FileResponse(file)
+
+    async def publish(self, uri, data, event_type='Update'):
+        """更新资源并推送给订阅了该uri的websocket"""
+        if event_type == 'Delete':
+            self.resources.pop(uri, None)
+        else:
+            self.resources[uri] = data
+        name = event_name(uri)
+        for ws, events in list(self.sockets.items()):
+            for event in events:
+                if name.startswith(event):
+                    payload = {'data': data, 'eventType': event_type, 'uri': uri}
+                    await ws.send_str(json.dumps([8, event, payload]))
+                    break
+
+    def wait_request(self, method, path):
+        """等待下一个匹配的请求到达"""
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append((method.upper(), path, future))
+        return future
+
+    async def wait_subscribed(self, event, timeout=10):
+        """等待客户端订阅事件"""
+        async with asyncio.timeout(timeout):
+            while not any(event in events for events in self.sockets.values()):
+                await asyncio.sleep(0.01)
+
+    async def play(self, script=GAMEFLOW_SCRIPT, loop=False):
+        """按脚本回放事件"""
+        while True:
+            for delay, uri, data in script:
+                await asyncio.sleep(delay)
+                await self.publish(uri, data)
+            if not loop:
+                return
+
+
+async def main():
+    fake = await FakeLcu().start()
+    print(f'fake lcu: port = {fake.port} token = {fake.token}')
+    try:
+        await fake.play(loop=True)
+    finally:
+        await fake.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+"""
+把录制的英雄选择session序列逐条交给 ChampSelectEngine 打印发出的请求 以及每条session的处理耗时
+
+python -m tools.replay_champ_select [session序列.json ...]
+json文件内容为session列表 不指定时使用内置的序列
+"""
+import asyncio
+import copy
+import json
+import sys
+import time
+
+from app.common.config import cfg
+from app.lol.champ_select import ChampSelectEngine
+from tools.fake_lcu import make_champ_select_session
+
+
+class RecordingLcu:
+    """只记录请求 不连接客户端"""
+
+    def __init__(self):
+        self.requests = []
+
+    async def select_champ(self, action_id, champ_id, completed=False):
+        self.requests.append(('pick', action_id, champ_id, completed))
+
+    async def ban_champ(self, action_id, champ_id, completed=False):
+        self.requests.append(('ban', action_id, champ_id, completed))
+
+
+def make_step(session, sequence):
+    """step(intents={cell: 英雄}, actions={(轮次, cell): (英雄, 进行中, 已完成)}) 修改session并记录一份"""
+
+    def step(**changes):
+        for cell_id, intent in changes.get('intents', {}).items():
+            session['myTeam'][cell_id]['championPickIntent'] = intent
+        for (turn, cell_id), (champ_id, in_progress, completed) in changes.get('actions', {}).items():
+            action = session['actions'][turn][cell_id]
+            action.update(championId=champ_id, isInProgress=in_progress, completed=completed)
+        sequence.append(copy.deepcopy(session))
+
+    return step
+
+
+def draft_sequence():
+    """队友预选157 22 -> 轮到自己亮起3 -> 3被队友选走 22不再被预选 -> 改为亮起22 -> 锁定"""
+    sequence = []
+    step = make_step(make_champ_select_session(in_progress=False), sequence)
+    step(intents={1: 157, 3: 22})
+    step(actions={(0, 1): (0, True, False)})
+    step(actions={(0, 1): (157, True, True)})
+    step(actions={(0, 0): (0, True, False)})
+    # 引擎亮起后客户端回传自己的选择
+    step(actions={(0, 0): (3, True, False)})
+    step(actions={(0, 2): (3, True, False)}, intents={3: 0})
+    step(actions={(0, 0): (22, True, False)})
+    step(actions={(0, 0): (22, False, True)})
+    return sequence
+
+
+def ban_sequence():
+    """队友预选238 禁用轮开始时队友已亮起禁用55 -> 跳过238 55 禁用11 之后队友的变化不再更换"""
+    sequence = []
+    step = make_step(make_champ_select_session(in_progress=False, ban_turn=True), sequence)
+    step(intents={1: 238})
+    step(actions={(0, cell_id): (55 if cell_id == 2 else 0, True, False) for cell_id in range(10)})
+    step(actions={(0, 3): (11, True, False)})
+    step(actions={(0, 0): (11, False, True)})
+    return sequence
+
+
+async def replay(sequence, want=(157, 3, 22), ban=(238, 55, 11, 7)):
+    cfg.wantSelectChamps.value = list(want)
+    cfg.wantBanChamps.value = list(ban)
+    cfg.enableAutoBan.value = True
+    cfg.banHoverFirst.value = False
+    # 只亮起不锁定 才会出现换英雄的情况
+    cfg.enableAutoSelect.value = False
+    lcu = RecordingLcu()
+    engine = ChampSelectEngine(lcu)
+    cost = 0
+    for session in sequence:
+        before = len(lcu.requests)
+        start = time.perf_counter()
+        await engine.update(session)
+        cost += time.perf_counter() - start
+        for request in lcu.requests[before:]:
+            print('   ', request)
+    print(f'{len(sequence)} sessions, {len(lcu.requests)} requests, {cost / len(sequence) * 1e6:.1f}us/session')
+
+
+async def main(files):
+    sequences = []
+    for file in files:
+        with open(file, encoding='utf-8') as f:
+            sequences.append((file, json.load(f)))
+    sequences = sequences or [('draft', draft_sequence()), ('ban', ban_sequence())]
+    for name, sequence in sequences:
+        print(name)
+        await replay(sequence)
+
+
+if __name__ == '__main__':
+    asyncio.run(main(sys.argv[1:]))
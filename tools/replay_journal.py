@@ -0,0 +1,70 @@
+"""
+录制与回放websocket事件
+
+python -m tools.replay_journal record [次数]       # 连接模拟客户端 按脚本推送并录制 输出录制文件路径
+python -m tools.replay_journal 文件 [倍速]          # 1原速 N为N倍速 0尽快 回放给Lcu的所有订阅并输出回调耗时
+
+回放时REST请求没有客户端可用 依赖REST的回调会失败并计入错误
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from app.common.config import cfg
+from app.lol.journal import JournalReplayer, JournalWriter
+from app.lol.lcu import Lcu
+from app.lol.metrics import metrics
+from tools.fake_lcu import FakeLcu, GAMEFLOW_SCRIPT
+
+
+async def record(rounds=3):
+    fake = await FakeLcu().start()
+    lcu = Lcu()
+    # 录制不应触发自动接受
+    cfg.enableAutoAccept.value = False
+    try:
+        await lcu.connect(fake.port, fake.token)
+        await fake.wait_subscribed('OnJsonApiEvent_lol-gameflow_v1_gameflow-phase')
+        lcu.journal = JournalWriter.create(tempfile.mkdtemp())
+        lcu.listener.journal = lcu.journal
+        for _ in range(rounds):
+            await fake.play([(delay / 10, uri, data) for delay, uri, data in GAMEFLOW_SCRIPT])
+        await asyncio.sleep(0.1)
+        file = lcu.journal.file
+    finally:
+        await lcu.close()
+        await fake.close()
+    print(file)
+
+
+async def replay(file, speed=1.0):
+    replayer = JournalReplayer(file)
+    lcu = Lcu()
+    cfg.enableAutoAccept.value = False
+    listener = lcu.create_ws_listener(None)
+    metrics.enabled = True
+
+    start = time.perf_counter()
+    dispatched = await replayer.replay(listener, speed)
+    # 等待回调执行完
+    while listener.tasks.tasks:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    lcu.coalescer.cancel()
+
+    print(f'{len(replayer)} frames ({replayer.duration:.2f}s recorded) -> {dispatched} events '
+          f'in {elapsed:.3f}s at speed {speed}')
+    for name, row in metrics.snapshot()['handlers'].items():
+        print(f'{name:<32} n={row["count"]:<6} errors={row["errors"]:<4} '
+              f'p50={row["p50_us"]:>6}us p99={row["p99_us"]:>6}us')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'record':
+        asyncio.run(record(*map(int, sys.argv[2:])))
+    elif len(sys.argv) > 1 and os.path.exists(sys.argv[1]):
+        asyncio.run(replay(sys.argv[1], *map(float, sys.argv[2:])))
+    else:
+        print(__doc__)